@@ -0,0 +1,182 @@
+"""
+Runs the benchmark suite and compares the results with a stored baseline.
+
+    python -m benchmarks                    # run everything, compare to the baseline
+    python -m benchmarks -k leb128          # only the cases matching "leb128"
+    python -m benchmarks --save             # store the results as the new baseline
+    python -m benchmarks --check 1.25       # fail if a case got 25% slower
+"""
+
+import argparse
+import json
+import pathlib
+import platform
+import sys
+import time
+import tracemalloc
+
+from benchmarks.cases import cases
+from benchmarks.corpus import Corpus
+
+_BASELINE = pathlib.Path(__file__).with_name("baseline.json")
+
+# the roundtrip through TwoWayStream may cost at most this much more than through a
+# SerializingStream/DeserializingStream pair
+_TWOWAY_BUDGET = 1.25
+
+
+def _measure(setup, corpus: Corpus, repeat: int) -> dict[str, float]:
+    run, ops, nbytes = setup(corpus)
+
+    # warm up caches, then keep the fastest of `repeat` runs
+    run()
+    best = float("inf")
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+
+    # the most memory held at once during a run. objects freed before the next
+    # operation, like the values returned by scalar reads, do not add up.
+    tracemalloc.start()
+
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "ops_per_sec": ops / best,
+        "bytes_per_sec": nbytes / best,
+        "peak_memory": peak,
+    }
+
+
+def _format_rate(value: float, unit: str) -> str:
+    for prefix in ("", "k", "M"):
+        if value < 1000:
+            return f"{value:7.2f} {prefix}{unit}"
+
+        value /= 1000
+
+    return f"{value:7.2f} G{unit}"
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument(
+        "--size", type=int, default=1 << 20, help="corpus size in bytes"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="corpus seed")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case")
+    parser.add_argument("-k", dest="pattern", default="", help="case name filter")
+    parser.add_argument(
+        "--baseline", type=pathlib.Path, default=_BASELINE, help="baseline file"
+    )
+    parser.add_argument(
+        "--save", action="store_true", help="store the results as the baseline"
+    )
+    parser.add_argument(
+        "--check",
+        type=float,
+        metavar="RATIO",
+        help="exit with an error if a case is RATIO times slower than the baseline",
+    )
+
+    return parser.parse_args(argv)
+
+
+def _load_baseline(args: argparse.Namespace) -> dict[str, dict[str, float]]:
+    if not args.baseline.exists():
+        return {}
+
+    stored = json.loads(args.baseline.read_text())
+
+    if (stored["size"], stored["seed"]) != (args.size, args.seed):
+        print(f"{args.baseline} was recorded with another corpus, ignoring it")
+
+        return {}
+
+    return stored["results"]
+
+
+def _run_cases(
+    args: argparse.Namespace, corpus: Corpus, baseline: dict[str, dict[str, float]]
+) -> tuple[dict[str, dict[str, float]], list[str]]:
+    # returns the results, and the names of the cases slower than --check allows
+    results = {}
+    regressions = []
+
+    print(f"{'case':32} {'ops':>11} {'throughput':>12} {'peak mem':>10} {'vs base':>8}")
+
+    for name, setup in cases.items():
+        if args.pattern not in name:
+            continue
+
+        result = results[name] = _measure(setup, corpus, args.repeat)
+        line = (
+            f"{name:32} {_format_rate(result['ops_per_sec'], '/s')} "
+            f"{_format_rate(result['bytes_per_sec'], 'B/s')} "
+            f"{_format_rate(result['peak_memory'], 'B'):>10}"
+        )
+
+        if name in baseline:
+            # how many times slower than the baseline
+            ratio = baseline[name]["ops_per_sec"] / result["ops_per_sec"]
+            line += f" {ratio:7.2f}x"
+
+            if args.check is not None and ratio > args.check:
+                regressions.append(name)
+
+        print(line)
+
+    return results, regressions
+
+
+def _twoway_within_budget(results: dict[str, dict[str, float]]) -> bool:
+    if "roundtrip[twoway]" not in results or "roundtrip[pair]" not in results:
+        return True
+
+    overhead = (
+        results["roundtrip[pair]"]["ops_per_sec"]
+        / results["roundtrip[twoway]"]["ops_per_sec"]
+    )
+    print(f"\nTwoWayStream overhead: {overhead:.2f}x (budget {_TWOWAY_BUDGET}x)")
+
+    return overhead <= _TWOWAY_BUDGET
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    baseline = _load_baseline(args)
+    results, regressions = _run_cases(args, Corpus(args.size, args.seed), baseline)
+
+    if not _twoway_within_budget(results):
+        regressions.append("roundtrip[twoway] overhead")
+
+    if args.save:
+        args.baseline.write_text(
+            json.dumps(
+                {
+                    "size": args.size,
+                    "seed": args.seed,
+                    "python": platform.python_version(),
+                    "results": baseline | results,
+                },
+                indent=2,
+            )
+        )
+        print(f"\nbaseline saved to {args.baseline}")
+
+    if regressions:
+        print(f"\nregressions: {', '.join(regressions)}")
+
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
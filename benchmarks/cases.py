@@ -0,0 +1,399 @@
+import io
+import struct
+import typing
+from typing import Annotated
+
+from datastream import (
+    BitReader,
+    ByteOrder,
+    DeserializingStream,
+    Record,
+    SerializingStream,
+    TwoWayStream,
+)
+from datastream.base import _type_formats
+from datastream.codec import UInt16, UInt32, ULeb128, ULeb128Str, codec
+
+from benchmarks.corpus import Corpus
+
+# a benchmark setup returns the function to time, the number of operations and the
+# number of bytes it processes per call
+Setup = typing.Callable[[Corpus], tuple[typing.Callable[[], typing.Any], int, int]]
+
+cases: dict[str, Setup] = {}
+
+
+def case(name: str) -> typing.Callable[[Setup], Setup]:
+    def register(setup: Setup) -> Setup:
+        cases[name] = setup
+
+        return setup
+
+    return register
+
+
+# the streams every read benchmark runs against
+_read_backends = {
+    "bytesio": lambda data: DeserializingStream(data, ByteOrder.LITTLE_ENDIAN),
+    "buffer": lambda data: DeserializingStream.from_buffer(
+        data, ByteOrder.LITTLE_ENDIAN
+    ),
+}
+
+# the streams every write benchmark runs against
+_write_backends = {
+    "bytesio": lambda size: SerializingStream(byteorder=ByteOrder.LITTLE_ENDIAN),
+    "capacity": lambda size: SerializingStream(
+        byteorder=ByteOrder.LITTLE_ENDIAN, capacity=size
+    ),
+}
+
+
+def _typed_read(backend: str, name: str) -> Setup:
+    size = struct.calcsize("<" + _type_formats[name])
+
+    def setup(corpus: Corpus):
+        stream = _read_backends[backend](corpus.fixed)
+        read = getattr(stream, f"read_{name}")
+        count = corpus.size // size
+
+        def run():
+            stream.seek(0)
+
+            for _ in range(count):
+                read()
+
+        return run, count, count * size
+
+    return setup
+
+
+def _typed_write(backend: str, name: str) -> Setup:
+    size = struct.calcsize("<" + _type_formats[name])
+
+    def setup(corpus: Corpus):
+        count = corpus.size // size
+        reader = DeserializingStream(corpus.fixed, ByteOrder.LITTLE_ENDIAN)
+        values = list(reader.read_array(name, count))
+
+        def run():
+            stream = _write_backends[backend](count * size)
+            write = getattr(stream, f"write_{name}")
+
+            for value in values:
+                write(value)
+
+        return run, count, count * size
+
+    return setup
+
+
+def _record_write(backend: str) -> Setup:
+    record = Record("Entry", [("id", "uint32"), ("offset", "uint64"), ("flag", "bool")])
+
+    def setup(corpus: Corpus):
+        count = len(corpus.fixed) // record.size
+        reader = DeserializingStream(corpus.fixed, ByteOrder.LITTLE_ENDIAN)
+        values = list(reader.iter_records(record, count))
+
+        def run():
+            stream = _write_backends[backend](count * record.size)
+
+            for value in values:
+                stream.write_record(record, value)
+
+        return run, count, count * record.size
+
+    return setup
+
+
+for _backend in _read_backends:
+    for _name in _type_formats:
+        case(f"read_{_name}[{_backend}]")(_typed_read(_backend, _name))
+
+for _backend in _write_backends:
+    for _name in _type_formats:
+        case(f"write_{_name}[{_backend}]")(_typed_write(_backend, _name))
+    case(f"write_record[{_backend}]")(_record_write(_backend))
+
+
+@case("read_format[bytesio]")
+def read_format(corpus: Corpus):
+    stream = DeserializingStream(corpus.fixed)
+    count = len(corpus.fixed) // 8
+
+    def run():
+        stream.seek(0)
+
+        for _ in range(count):
+            stream.read_format("Q")
+
+    return run, count, count * 8
+
+
+@case("read_array[uint32]")
+def read_array(corpus: Corpus):
+    stream = DeserializingStream.from_buffer(corpus.fixed)
+    count = len(corpus.fixed) // 4
+
+    def run():
+        stream.seek(0)
+        stream.read_array("uint32", count)
+
+    return run, count, count * 4
+
+
+@case("read_uleb128")
+def read_uleb128(corpus: Corpus):
+    stream = DeserializingStream.from_buffer(corpus.uleb128)
+    count = len(corpus.integers)
+
+    def run():
+        stream.seek(0)
+
+        for _ in range(count):
+            stream.read_uleb128()
+
+    return run, count, len(corpus.uleb128)
+
+
+@case("read_uleb128_many")
+def read_uleb128_many(corpus: Corpus):
+    stream = DeserializingStream.from_buffer(corpus.uleb128)
+
+    def run():
+        stream.seek(0)
+        stream.read_uleb128_many()
+
+    return run, len(corpus.integers), len(corpus.uleb128)
+
+
+@case("write_uleb128")
+def write_uleb128(corpus: Corpus):
+    values = corpus.integers
+
+    def run():
+        stream = SerializingStream()
+
+        for value in values:
+            stream.write_uleb128(value)
+
+    return run, len(values), len(corpus.uleb128)
+
+
+@case("write_uleb128_many")
+def write_uleb128_many(corpus: Corpus):
+    values = corpus.integers
+
+    def run():
+        SerializingStream().write_uleb128_many(values)
+
+    return run, len(values), len(corpus.uleb128)
+
+
+@case("search")
+def search(corpus: Corpus):
+    # a needle that is not in the lines corpus, so every search scans all of it
+    stream = DeserializingStream(corpus.lines)
+
+    def run():
+        stream.search(b"missing")
+
+    return run, 1, len(corpus.lines)
+
+
+@case("read_until")
+def read_until(corpus: Corpus):
+    stream = DeserializingStream(corpus.lines)
+    count = corpus.lines.count(b"\n")
+
+    def run():
+        stream.seek(0)
+
+        for _ in range(count):
+            stream.read_until(b"\n")
+
+    return run, count, len(corpus.lines)
+
+
+@case("read_strings")
+def read_strings(corpus: Corpus):
+    stream = DeserializingStream.from_buffer(corpus.prefixed_strings)
+    count = len(corpus.strings)
+
+    def run():
+        stream.seek(0)
+        stream.read_strings(count, intern={})
+
+    return run, count, len(corpus.prefixed_strings)
+
+
+@case("iter_records")
+def iter_records(corpus: Corpus):
+    record = Record("Entry", [("id", "uint32"), ("offset", "uint64"), ("flag", "bool")])
+    stream = DeserializingStream.from_buffer(corpus.fixed)
+    count = len(corpus.fixed) // record.size
+
+    def run():
+        stream.seek(0)
+
+        for _ in stream.iter_records(record, count):
+            pass
+
+    return run, count, count * record.size
+
+
+@case("read_bits")
+def read_bits(corpus: Corpus):
+    stream = DeserializingStream.from_buffer(corpus.fixed)
+    count = len(corpus.fixed) * 8 // 12
+
+    def run():
+        stream.seek(0)
+        bits = BitReader(stream)
+
+        for _ in range(count):
+            bits.read_bits(12)
+
+    return run, count, count * 12 // 8
+
+
+@case("read_bits_array")
+def read_bits_array(corpus: Corpus):
+    stream = DeserializingStream.from_buffer(corpus.fixed)
+    count = len(corpus.fixed) * 8 // 12
+
+    def run():
+        stream.seek(0)
+        BitReader(stream).read_bits_array(12, count)
+
+    return run, count, count * 12 // 8
+
+
+@case("substream")
+def substream(corpus: Corpus):
+    stream = DeserializingStream(corpus.fixed)
+    count = 1000
+    step = max(1, len(corpus.fixed) // count)
+
+    def run():
+        for start in range(0, step * count, step):
+            stream.substream(start, start + step)
+
+    return run, count, step * count
+
+
+@case("clone")
+def clone(corpus: Corpus):
+    stream = DeserializingStream(corpus.fixed)
+    count = 1000
+
+    def run():
+        for _ in range(count):
+            stream.clone()
+
+    return run, count, 0
+
+
+def _roundtrip(writer: typing.Any, reader: typing.Any, count: int):
+    def run():
+        writer.seek(0)
+
+        for i in range(count):
+            writer.write_uint32(i)
+
+        reader.seek(0)
+
+        for _ in range(count):
+            reader.read_uint32()
+
+    return run, count * 2, count * 8
+
+
+@case("roundtrip[twoway]")
+def roundtrip_twoway(corpus: Corpus):
+    stream = TwoWayStream()
+
+    return _roundtrip(stream, stream, corpus.size // 4)
+
+
+@case("roundtrip[pair]")
+def roundtrip_pair(corpus: Corpus):
+    buffer = io.BytesIO()
+
+    return _roundtrip(
+        SerializingStream(buffer), DeserializingStream(buffer), corpus.size // 4
+    )
+
+
+@case("write_seekpeek[twoway]")
+def write_seekpeek(corpus: Corpus):
+    # appends to a large stream, peeking back at its start after every write
+    stream = TwoWayStream(corpus.fixed)
+    count = 1000
+
+    def run():
+        stream.seek(0, io.SEEK_END)
+
+        for i in range(count):
+            stream.write_uint32(i)
+            stream.seekpeek(0, 4)
+
+    return run, count * 2, count * 8
+
+
+@codec
+class _Entry:
+    id: Annotated[int, UInt32]
+    kind: Annotated[int, UInt16]
+    flags: Annotated[int, UInt16]
+    length: Annotated[int, ULeb128]
+    name: ULeb128Str
+
+
+def _entries(corpus: Corpus) -> tuple[bytes, int]:
+    stream = SerializingStream()
+    count = corpus.size // 32
+
+    for i, name in zip(range(count), corpus.strings, strict=False):
+        _Entry(i, i & 0xFFFF, 0, i * 3, name).to_stream(stream)
+
+    return bytes(stream), count
+
+
+@case("from_stream[codec]")
+def from_stream_codec(corpus: Corpus):
+    data, count = _entries(corpus)
+    stream = DeserializingStream.from_buffer(data)
+
+    def run():
+        stream.seek(0)
+
+        for _ in range(count):
+            _Entry.from_stream(stream)
+
+    return run, count, len(data)
+
+
+@case("from_stream[manual]")
+def from_stream_manual(corpus: Corpus):
+    data, count = _entries(corpus)
+    stream = DeserializingStream.from_buffer(data)
+
+    # the hand-written equivalent of the generated decoder
+    def from_stream(stream):
+        return _Entry(
+            stream.read_uint32(),
+            stream.read_uint16(),
+            stream.read_uint16(),
+            stream.read_uleb128(),
+            stream.read_string(),
+        )
+
+    def run():
+        stream.seek(0)
+
+        for _ in range(count):
+            from_stream(stream)
+
+    return run, count, len(data)
@@ -0,0 +1,87 @@
+import functools
+import random
+
+from datastream import ByteOrder, SerializingStream
+
+
+class Corpus:
+    """
+    Synthetic inputs for the benchmarks. Every corpus is generated from a fixed
+    seed, so runs with the same size and seed measure the same data.
+
+    Args:
+        size (int): The approximate size of each corpus in bytes.
+        seed (int, optional): The seed of the generator. Defaults to 0.
+    """
+
+    def __init__(self, size: int, seed: int = 0):
+        self.size = size
+        self.seed = seed
+
+    def _random(self, name: str) -> random.Random:
+        # one generator per corpus, so they do not depend on each other
+        return random.Random(f"{self.seed}:{name}") # noqa: S311
+
+    @functools.cached_property
+    def fixed(self) -> bytes:
+        """
+        Random bytes, read as fixed-width values of any type.
+        """
+        return self._random("fixed").randbytes(self.size)
+
+    @functools.cached_property
+    def integers(self) -> list[int]:
+        """
+        Unsigned integers of mixed magnitude, as found in offsets and lengths.
+        """
+        rng = self._random("integers")
+        # about two bytes per value once encoded as LEB128
+        count = self.size // 2
+
+        return [rng.getrandbits(rng.choice((4, 7, 14, 21, 32))) for _ in range(count)]
+
+    @functools.cached_property
+    def uleb128(self) -> bytes:
+        """
+        `integers`, encoded as ULEB128.
+        """
+        stream = SerializingStream(byteorder=ByteOrder.LITTLE_ENDIAN)
+        stream.write_uleb128_many(self.integers)
+
+        return bytes(stream)
+
+    @functools.cached_property
+    def strings(self) -> list[str]:
+        """
+        Short identifiers with many repeats, as found in string tables.
+        """
+        rng = self._random("strings")
+        vocabulary = [f"symbol_{i}_{'x' * rng.randrange(16)}" for i in range(256)]
+
+        return [rng.choice(vocabulary) for _ in range(self.size // 16)]
+
+    @functools.cached_property
+    def prefixed_strings(self) -> bytes:
+        """
+        `strings`, encoded with ULEB128 length prefixes.
+        """
+        stream = SerializingStream()
+        stream.write_strings(self.strings)
+
+        return bytes(stream)
+
+    @functools.cached_property
+    def lines(self) -> bytes:
+        """
+        Newline-terminated text records of varying length.
+        """
+        rng = self._random("lines")
+        lines = []
+        total = 0
+
+        while total < self.size:
+            line = b"field=" + b"v" * rng.randrange(8, 120) + b"\n"
+            lines.append(line)
+            total += len(line)
+
+        return b"".join(lines)
@@ -1,6 +1,21 @@
+from datastream.aio import AsyncDeserializingStream, AsyncSerializingStream
 from datastream.base import ByteOrder
+from datastream.bits import BitReader, BitWriter
 from datastream.deserializing import DeserializingStream
+from datastream.index import RecordIndex
+from datastream.record import Record
 from datastream.serializing import SerializingStream
 from datastream.twoway import TwoWayStream
 
-__all__ = ["ByteOrder", "DeserializingStream", "SerializingStream", "TwoWayStream"]
+__all__ = [
+    "AsyncDeserializingStream",
+    "AsyncSerializingStream",
+    "BitReader",
+    "BitWriter",
+    "ByteOrder",
+    "DeserializingStream",
+    "Record",
+    "RecordIndex",
+    "SerializingStream",
+    "TwoWayStream",
+]
@@ -0,0 +1,322 @@
+import array
+import asyncio
+import typing
+
+from datastream.base import (
+    BaseStream,
+    ByteOrder,
+    _array_typecode,
+    _byteorder_map,
+    _struct_caches,
+    _type_formats,
+)
+from datastream.deserializing import _leb128_value
+from datastream.serializing import _encode_sleb128, _encode_uleb128
+
+
+class _AsyncStream:
+    def __init__(self, byteorder: int):
+        self._byteorder = _byteorder_map[byteorder]
+        self._structs = _struct_caches[self._byteorder]
+
+    byteorder = BaseStream.byteorder
+
+
+class AsyncDeserializingStream(_AsyncStream):
+    """
+    Deserializes data from an `asyncio.StreamReader`. Every read waits until
+    enough data has arrived; reads that hit the end of the stream raise
+    `asyncio.IncompleteReadError`.
+
+    Args:
+        reader (asyncio.StreamReader): The reader to deserialize from.
+        byteorder (int, optional): The byte order of the stream. Defaults to
+            ByteOrder.NATIVE_ENDIAN.
+    """
+
+    def __init__(
+        self, reader: asyncio.StreamReader, byteorder: int = ByteOrder.NATIVE_ENDIAN
+    ):
+        super().__init__(byteorder)
+
+        self._reader = reader
+
+    async def read(self, size: int = -1) -> bytes:
+        """
+        Reads up to `size` bytes. If `size` is negative, reads until the end of the
+        stream.
+
+        Returns:
+            bytes: The bytes read.
+        """
+        return await self._reader.read(size)
+
+    async def read_exactly(self, size: int) -> bytes:
+        """
+        Reads exactly `size` bytes.
+
+        Returns:
+            bytes: The bytes read.
+        """
+        return await self._reader.readexactly(size)
+
+    async def read_format(self, fmt: str) -> typing.Any:
+        compiled = self._structs[fmt]
+
+        return compiled.unpack(await self._reader.readexactly(compiled.size))[0]
+
+    async def read_until(self, terminator: bytes) -> bytes:
+        return await self._reader.readuntil(terminator)
+
+    async def read_array(self, fmt: str, count: int) -> array.array:
+        """
+        Reads `count` consecutive values of the same type with a single decode call.
+
+        Args:
+            fmt (str): The type of the values, either a struct format character
+                ("I") or a type name ("uint32").
+            count (int): The number of values to read.
+
+        Returns:
+            array.array: The values read.
+        """
+        fmt = _type_formats.get(fmt, fmt)
+        itemsize = self._structs[fmt].size
+        values = array.array(_array_typecode(fmt, itemsize))
+
+        values.frombytes(await self._reader.readexactly(itemsize * count))
+
+        if self._structs.byteswap:
+            values.byteswap()
+
+        return values
+
+    async def read_int64(self) -> int:
+        return await self.read_format("q")
+
+    async def read_uint64(self) -> int:
+        return await self.read_format("Q")
+
+    async def read_int32(self) -> int:
+        return await self.read_format("i")
+
+    async def read_uint32(self) -> int:
+        return await self.read_format("I")
+
+    async def read_int16(self) -> int:
+        return await self.read_format("h")
+
+    async def read_uint16(self) -> int:
+        return await self.read_format("H")
+
+    async def read_int8(self) -> int:
+        return await self.read_format("b")
+
+    async def read_uint8(self) -> int:
+        return (await self._reader.readexactly(1))[0]
+
+    async def read_float(self) -> float:
+        return await self.read_format("f")
+
+    async def read_double(self) -> float:
+        return await self.read_format("d")
+
+    async def read_bool(self) -> bool:
+        return bool(await self.read_uint8())
+
+    async def _read_leb128(self, max_bytes: int, signed: bool) -> int:
+        if max_bytes == 0:
+            return 0
+
+        # collect the bytes of the value, then decode them like the sync readers
+        data = bytearray(await self._reader.readexactly(1))
+
+        while max_bytes != 0 and data[-1] & 0x80:
+            data += await self._reader.readexactly(1)
+            max_bytes -= 1
+
+        return _leb128_value(data, signed)
+
+    async def read_uleb128(self) -> int:
+        """
+        Reads an unsigned LEB128 (Little-Endian Base 128) encoded integer from the
+        data stream. Keep in mind that this method does not perform any bounds
+        checking, so it is possible to read an arbitrarily large integer if a
+        malformed sequence is read.
+
+        Returns:
+            int: The decoded unsigned integer.
+        """
+        return await self.read_uleb128_safe(-1)
+
+    async def read_uleb128_safe(self, max_bytes: int = 16) -> int:
+        """
+        Reads an unsigned LEB128 (Little-Endian Base 128) encoded integer from the
+        data stream.
+
+        Args:
+            max_bytes (int, optional): The maximum number of bytes to read before
+                stopping. Defaults to 16.
+
+        Returns:
+            int: The decoded unsigned integer.
+        """
+        return await self._read_leb128(max_bytes, False)
+
+    async def read_sleb128(self) -> int:
+        """
+        Reads a signed LEB128 (Little-Endian Base 128) encoded integer from the data
+        stream. Keep in mind that this method does not perform any bounds checking,
+        so it is possible to read an arbitrarily large integer if a malformed
+        sequence is read.
+
+        Returns:
+            int: The decoded signed integer.
+        """
+        return await self.read_sleb128_safe(-1)
+
+    async def read_sleb128_safe(self, stop_after: int = 5) -> int:
+        """
+        Reads a signed LEB128 (Little-Endian Base 128) encoded integer from the data
+        stream.
+
+        Args:
+            stop_after (int, optional): The maximum number of bytes to read before
+                stopping. Defaults to 5.
+
+        Returns:
+            int: The decoded signed integer.
+        """
+        return await self._read_leb128(stop_after, True)
+
+
+class AsyncSerializingStream(_AsyncStream):
+    """
+    Serializes data to an `asyncio.StreamWriter`. Writes are collected in a local
+    buffer and handed to the writer in one call by `drain`.
+
+    Args:
+        writer (asyncio.StreamWriter): The writer to serialize to.
+        byteorder (int, optional): The byte order of the stream. Defaults to
+            ByteOrder.NATIVE_ENDIAN.
+    """
+
+    def __init__(
+        self, writer: asyncio.StreamWriter, byteorder: int = ByteOrder.NATIVE_ENDIAN
+    ):
+        super().__init__(byteorder)
+
+        self._writer = writer
+        self._buffer = bytearray()
+
+    async def __aenter__(self) -> typing.Self:
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            await self.close()
+        else:
+            self._writer.close()
+
+    def pending(self) -> int:
+        """
+        Returns the number of buffered bytes that have not been drained yet.
+
+        Returns:
+            int: The number of buffered bytes.
+        """
+        return len(self._buffer)
+
+    async def drain(self):
+        """
+        Hands the buffered bytes to the writer and waits until it is ready to accept
+        more data.
+        """
+        if self._buffer:
+            self._writer.write(self._buffer)
+            self._buffer = bytearray()
+
+        await self._writer.drain()
+
+    async def close(self):
+        """
+        Drains the buffered bytes and closes the writer.
+        """
+        await self.drain()
+
+        self._writer.close()
+
+        await self._writer.wait_closed()
+
+    def write(self, data: bytes):
+        self._buffer += data
+
+    def write_format(self, fmt: str, value: typing.Any):
+        self._buffer += self._structs[fmt].pack(value)
+
+    def write_array(self, fmt: str, values: typing.Iterable[typing.Any]):
+        fmt = _type_formats.get(fmt, fmt)
+        values = array.array(_array_typecode(fmt, self._structs[fmt].size), values)
+
+        if self._structs.byteswap:
+            values.byteswap()
+
+        self._buffer += values
+
+    def write_int64(self, value: int):
+        # convert to signed if necessary
+        if value > 0x7FFFFFFFFFFFFFFF:
+            value = -0x10000000000000000 + value
+
+        self.write_format("q", value)
+
+    def write_uint64(self, value: int):
+        self.write_format("Q", value)
+
+    def write_int32(self, value: int):
+        if value > 0x7FFFFFFF:
+            value = -0x100000000 + value
+
+        self.write_format("i", value)
+
+    def write_uint32(self, value: int):
+        self.write_format("I", value)
+
+    def write_int16(self, value: int):
+        if value > 0x7FFF:
+            value = -0x10000 + value
+
+        self.write_format("h", value)
+
+    def write_uint16(self, value: int):
+        self.write_format("H", value)
+
+    def write_int8(self, value: int):
+        if value > 0x7F:
+            value = -0x100 + value
+
+        self.write_format("b", value)
+
+    def write_uint8(self, value: int):
+        self.write_format("B", value)
+
+    def write_float(self, value: float):
+        self.write_format("f", value)
+
+    def write_double(self, value: float):
+        self.write_format("d", value)
+
+    def write_bool(self, value: bool):
+        self.write_uint8(int(value))
+
+    def write_uleb128(self, value: int):
+        self.write_uleb128_safe(value, -1)
+
+    def write_uleb128_safe(self, value: int, max_bytes: int = 16):
+        _encode_uleb128(value, max_bytes, self._buffer)
+
+    def write_sleb128(self, value: int):
+        self.write_sleb128_safe(value, -1)
+
+    def write_sleb128_safe(self, value: int, max_bytes: int = 5):
+        _encode_sleb128(value, max_bytes, self._buffer)
@@ -1,7 +1,14 @@
+import array
 import io
+import struct
+import sys
 import typing
 from enum import IntEnum
 
+from datastream import stats as _stats
+from datastream.buffer import BufferIO, GatherIO, SourceIO
+from datastream.checksum import Checksum
+
 
 # these constants refer to the index of the byteorder character in _byteorder_map
 class ByteOrder(IntEnum):
@@ -24,28 +31,170 @@ class ByteOrder(IntEnum):
 _byteorder_map = "!@<>"
 
 
+# struct format characters of the typed read_*/write_* methods
+_type_formats = {
+    "int8": "b",
+    "uint8": "B",
+    "int16": "h",
+    "uint16": "H",
+    "int32": "i",
+    "uint32": "I",
+    "int64": "q",
+    "uint64": "Q",
+    "float": "f",
+    "double": "d",
+    "bool": "?",
+}
+
+# the width of the signed struct formats. the typed writers wrap values past the
+# signed maximum around, so write_int8(0xFF) writes -1.
+_signed_bits = {"b": 8, "h": 16, "i": 32, "q": 64}
+
+
+# numeric kind of the struct format characters that can be read as arrays
+_format_kinds = dict.fromkeys("bhilqn", "i") | dict.fromkeys("BHILQN?", "u")
+_format_kinds |= dict.fromkeys("fd", "f")
+
+# (kind, itemsize) -> array typecode. reversed so the smallest C type wins ties.
+_array_typecodes = {
+    (_format_kinds[typecode], array.array(typecode).itemsize): typecode
+    for typecode in reversed("bBhHiIlLqQfd")
+}
+
+
+def _array_typecode(fmt: str, itemsize: int) -> str:
+    try:
+        return _array_typecodes[_format_kinds[fmt], itemsize]
+    except KeyError:
+        raise ValueError(f"unsupported array format: {fmt!r}") from None
+
+
+# struct formats of the length prefixes accepted by the string and blob methods.
+# uleb128 prefixes are variable-width and have no format.
+_prefix_formats = {"uleb128": None, "uint8": "B", "uint16": "H", "uint32": "I"}
+
+
+def _prefix_format(prefix: str) -> str | None:
+    try:
+        return _prefix_formats[prefix]
+    except KeyError:
+        raise ValueError(f"unsupported length prefix: {prefix!r}") from None
+
+
+class _StructCache(dict):
+    """
+    Maps format strings to precompiled `struct.Struct` objects for a single byte
+    order. Formats are compiled on first use and reused afterwards.
+    """
+
+    def __init__(self, byteorder: str):
+        super().__init__()
+
+        self.byteorder = byteorder
+        # native-ordered arrays have to be byteswapped to match this byte order
+        self.byteswap = byteorder in "!>" if sys.byteorder == "little" else (
+            byteorder == "<"
+        )
+        # the matching numpy dtype byte order character
+        self.numpy_byteorder = {"!": ">", "@": "="}.get(byteorder, byteorder)
+        # multi-field formats are compiled without native alignment padding, so
+        # that they match a sequence of single-field reads
+        self.packed = self if byteorder != "@" else _StructCache("=")
+
+    def __missing__(self, fmt: str) -> struct.Struct:
+        compiled = self[fmt] = struct.Struct(self.byteorder + fmt)
+
+        return compiled
+
+
+# one cache per byteorder character, shared between all streams
+_struct_caches = {byteorder: _StructCache(byteorder) for byteorder in _byteorder_map}
+
+# the structs of the typed read_*/write_* methods, in plain dicts: lookups on the
+# _StructCache subclass miss the interpreter's fast path for exact dicts
+_scalar_structs = {
+    byteorder: {fmt: cache[fmt] for fmt in _type_formats.values()}
+    for byteorder, cache in _struct_caches.items()
+}
+
+
 class BaseStream:
     """
     Base class for stream operations.
 
     Args:
-        backing_stream (typing.IO[bytes]): The backing stream object.
+        backing_stream (typing.IO[bytes] | BufferIO | SourceIO): The backing stream
+            object.
         byteorder (int): The byte order of the stream.
     """
 
-    def __init__(self, backing_stream: typing.IO[bytes], byteorder: int):
+    # whether the stream appends to its backing stream. a BytesIO that is appended
+    # to is over-allocated, and getvalue() would shrink it to fit.
+    _appends = False
+
+    def __init__(
+        self, backing_stream: typing.IO[bytes] | BufferIO | SourceIO, byteorder: int
+    ):
+        self._byteorder = _byteorder_map[byteorder]
+        self._structs = _struct_caches[self._byteorder]
+        self._scalars = _scalar_structs[self._byteorder]
+        self._backing_stream = None
+        self._unpack = self._unpack_stream
+        self._pack = self._pack_stream
+        self._pack_value = self._pack_stream
+        # the checksums whose `with` blocks are open
+        self._checksums: tuple[Checksum, ...] = ()
+
         if backing_stream is None:
             return
 
-        if not isinstance(backing_stream, io.BytesIO):
-            raise ValueError("backing_stream must be a BytesIO object")
-
-        self._backing_stream = backing_stream
-        self._byteorder = _byteorder_map[byteorder]
+        self._set_backing_stream(backing_stream)
 
     def __enter__(self) -> typing.Self:
         return self
 
+    def enable_stats(
+        self, hook: _stats.StatsHook | None = None, timing: bool = False
+    ):
+        """
+        Starts counting the calls made to each public method of this stream, the
+        bytes read and written, and the number of seeks and searches. The
+        counters are kept by an instrumented subclass that this stream is
+        switched to, so streams without stats enabled pay nothing for them.
+
+        Args:
+            hook (typing.Callable, optional): Called after every instrumented call
+                with the stream, the method name, the number of bytes the position
+                advanced by (the bytes read, for `read_at`, the read_*_at methods
+                and peeks), and the elapsed time in seconds (None unless `timing`
+                is set). Methods returning generators, like `search_all`, are
+                counted once the generator is exhausted or closed, with the work
+                done while iterating it. Defaults to None.
+            timing (bool, optional): Whether to measure the cumulative time spent
+                in each method. Defaults to False.
+        """
+        _stats.enable_stats(self, hook, timing)
+
+    def disable_stats(self):
+        """
+        Stops counting and switches this stream back to its original class.
+        """
+        _stats.disable_stats(self)
+
+    def stats(self) -> dict[str, typing.Any]:
+        """
+        Returns a snapshot of the counters of this stream.
+
+        Raises:
+            ValueError: If stats are not enabled.
+
+        Returns:
+            dict[str, typing.Any]: The number of calls and, if timing is enabled,
+                the cumulative time per method under "calls" and "time", and the
+                "bytes_read", "bytes_written", "seeks" and "searches" totals.
+        """
+        return _stats.snapshot(self)
+
     def __exit__(self, exc_type, exc_value, traceback):
         if exc_type is not None:
             raise exc_type(exc_value).with_traceback(traceback)
@@ -72,6 +221,8 @@ class BaseStream:
             values.
         """
         self._byteorder = _byteorder_map[value]
+        self._structs = _struct_caches[self._byteorder]
+        self._scalars = _scalar_structs[self._byteorder]
 
     def read(self, size: int) -> bytes:
         """
@@ -88,6 +239,96 @@ class BaseStream:
 
         return self._backing_stream.read(size)
 
+    def _set_backing_stream(
+        self, backing_stream: typing.IO[bytes] | BufferIO | SourceIO
+    ):
+        if isinstance(backing_stream, BufferIO):
+            # decode and encode in place with unpack_from and pack_into
+            self._unpack = backing_stream.unpack
+            self._pack = backing_stream.pack
+            self._pack_value = backing_stream.pack_value
+        elif isinstance(backing_stream, SourceIO):
+            self._unpack = backing_stream.unpack
+            self._pack = self._pack_stream
+            self._pack_value = self._pack_value_stream
+        elif isinstance(backing_stream, GatherIO):
+            self._unpack = self._unpack_stream
+            self._pack = backing_stream.pack
+            self._pack_value = backing_stream.pack_value
+        elif isinstance(backing_stream, io.BytesIO):
+            self._unpack = self._unpack_stream
+            self._pack = self._pack_stream
+            self._pack_value = self._pack_value_stream
+        else:
+            raise ValueError(
+                "backing_stream must be a BytesIO, BufferIO, SourceIO or GatherIO "
+                "object"
+            )
+
+        self._backing_stream = backing_stream
+
+    def _unpack_stream(self, compiled: struct.Struct) -> tuple[typing.Any, ...]:
+        return compiled.unpack(self.read(compiled.size))
+
+    def _pack_stream(self, compiled: struct.Struct, *values: typing.Any):
+        self.write(compiled.pack(*values))
+
+    def _pack_value_stream(self, compiled: struct.Struct, value: typing.Any):
+        # single values skip the argument tuple of _pack_stream, and the backing
+        # stream is known to be set once this is bound
+        self._backing_stream.write(compiled.pack(value))
+
+    def _read_view(self, size: int) -> bytes | memoryview:
+        if isinstance(self._backing_stream, BufferIO | SourceIO):
+            return self._backing_stream.read_view(size)
+
+        return self.read(size)
+
+    def _getbuffer(self) -> bytes | memoryview:
+        # the whole contents of the backing stream, without copying them
+        if isinstance(self._backing_stream, BufferIO):
+            return self._backing_stream.getbuffer()
+
+        # getvalue() does not copy unless the BytesIO has exported views
+        return self._backing_stream.getvalue()
+
+    def _iter_views(self, start: int, end: int) -> typing.Iterator[memoryview]:
+        # views of the bytes at [start, end) of the backing stream, in order and
+        # without copying them
+        backing = self._backing_stream
+
+        if isinstance(backing, GatherIO):
+            offset = 0
+
+            # the segments are bytearrays or byte-format memoryviews
+            for segment in [*backing._segments, backing._scratch]:
+                if offset < end and start < offset + len(segment):
+                    with (
+                        memoryview(segment) as view,
+                        view[max(start - offset, 0):end - offset] as part,
+                    ):
+                        yield part
+
+                offset += len(segment)
+
+            return
+
+        if isinstance(backing, SourceIO):
+            # bytes before the window were handed to the taps when it dropped them
+            offset = max(start, backing._base) - backing._base
+
+            with (
+                memoryview(backing._window) as view,
+                view[offset:end - backing._base] as part,
+            ):
+                yield part
+
+            return
+
+        # getbuffer() on a BytesIO would copy its buffer if getvalue() shared it
+        with memoryview(self._getbuffer()) as buffer, buffer[start:end] as part:
+            yield part
+
     def size(self) -> int:
         """
         Returns the size of the backing stream.
@@ -95,7 +336,20 @@ class BaseStream:
         Returns:
             int: The size of the backing stream.
         """
-        return len(self._backing_stream.getvalue())
+        if isinstance(self._backing_stream, GatherIO):
+            # the segments would have to be joined first
+            return self._backing_stream.tell()
+
+        if isinstance(self._backing_stream, io.BytesIO):
+            # getbuffer() would copy the whole buffer if a substream, cursor or
+            # clone shares it through getvalue()
+            pos = self._backing_stream.tell()
+            size = self._backing_stream.seek(0, io.SEEK_END)
+            self._backing_stream.seek(pos)
+
+            return size
+
+        return self._backing_stream.getbuffer().nbytes
 
     def remaining(self) -> int:
         """
@@ -115,8 +369,18 @@ class BaseStream:
             whence (int, optional): The reference position from where the offset is
                 calculated. Defaults to io.SEEK_SET.
         """
+        for checksum in self._checksums:
+            # the bytes passed so far stay in the region if the position moves back
+            checksum._update(self.tell())
+
         self._backing_stream.seek(offset, whence)
 
+    def _reposition(self, pos: int):
+        # moves the position for the stream's own bookkeeping (restoring a saved
+        # position, skipping ahead while scanning) without the bytes passed so far
+        # becoming part of the open checksums
+        self._backing_stream.seek(pos)
+
     def tell(self) -> int:
         """
         Returns the current position of the stream.
@@ -146,11 +410,16 @@ class BaseStream:
 
     def clone(self) -> typing.Self:
         """
-        Creates a clone of the current object.
+        Creates a copy-on-write clone of the current object.
 
         Returns:
             A new instance of the same class with the same byte order and contents.
         """
+        if isinstance(self._backing_stream, BufferIO):
+            return self.__class__(self._backing_stream.clone(), self.byteorder)
+
+        # BytesIO shares the bytes returned by getvalue() until either side is
+        # written to, so this is copy-on-write as well
         return self.__class__(
             io.BytesIO(self._backing_stream.getvalue()), self.byteorder
         )
@@ -158,7 +427,8 @@ class BaseStream:
     def substream(self, start: int, end: int) -> typing.Self:
         """
         Returns a new instance of the same class, representing a substream of the
-        current stream.
+        current stream. The substream shares memory with the current stream and has
+        its own position and size.
 
         Args:
             start (int): The starting index of the substream.
@@ -168,9 +438,86 @@ class BaseStream:
             typing.Self: A new instance of the same class representing the substream.
 
         """
-        return self.__class__(
-            io.BytesIO(self._backing_stream.getvalue()[start:end]), self.byteorder
+        if isinstance(self._backing_stream, BufferIO):
+            window = self._backing_stream.window(start, end)
+        else:
+            # getvalue() hands out the BytesIO's own buffer until it is next
+            # written to, so the window does not copy anything
+            window = BufferIO(self._backing_stream.getvalue()).window(start, end)
+
+        return self.__class__(window, self.byteorder)
+
+    def cursor(self) -> typing.Self:
+        """
+        Returns a new instance of the same class over the same memory, with its own
+        position starting at 0. Reading from a cursor never moves the position of
+        this stream, so each thread can read through its own cursor over one shared
+        buffer without locks or copies. Cursors copy the buffer before writing to it
+        themselves. For streams backed by a buffer (`from_buffer`, `from_file`,
+        `capacity`), cursors see the writes this stream makes in place until it
+        has to copy or grow its buffer. Cursors of BytesIO-backed streams are
+        snapshots of the contents at the time they were created.
+
+        Returns:
+            typing.Self: A new instance of the same class sharing this stream's
+                memory.
+        """
+        views = isinstance(self._backing_stream, BufferIO) and (
+            self._backing_stream._views
         )
+        buffer = BufferIO(self._getbuffer(), views)
+        buffer._cow = True
+        buffer._set_limit()
+
+        return self.__class__(buffer, self.byteorder)
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        """
+        Reads up to `size` bytes at `offset` without using or moving the stream
+        position, like `os.pread`.
+
+        Args:
+            offset (int): The offset to read at.
+            size (int): The maximum number of bytes to read.
+
+        Returns:
+            bytes: The bytes read.
+        """
+        if offset < 0:
+            raise ValueError(f"negative offset: {offset}")
+
+        if self._appends and isinstance(self._backing_stream, io.BytesIO):
+            # the next write would have to grow the buffer back after getvalue().
+            # getbuffer() copies the buffer instead while getvalue() shares it, so
+            # read-only streams keep using getvalue().
+            with self._backing_stream.getbuffer() as buffer:
+                return buffer[offset:offset + size].tobytes()
+
+        return bytes(self._getbuffer()[offset:offset + size])
+
+    def checksum(self, function: typing.Any) -> Checksum:
+        """
+        Returns a context manager that hashes the bytes read or written while it is
+        active, straight from the backing buffer and without a second copy:
+
+            with stream.checksum(zlib.crc32) as crc:
+                header = stream.read_record(Header)
+                payload = stream.read(header.length)
+
+            if crc.value != stream.read_uint32():
+                ...
+
+        Args:
+            function (typing.Any): A checksum function taking the data and the
+                running value, like `zlib.crc32` or `zlib.adler32`, a hash
+                constructor like `hashlib.sha256`, or a hash object with an
+                `update` method.
+
+        Returns:
+            Checksum: The running checksum, available as `value` inside the block
+                and after it.
+        """
+        return Checksum(self, function)
 
     def peek(self, size: int) -> bytes:
         """
@@ -183,12 +530,11 @@ class BaseStream:
             bytes: The next `size` bytes from the stream.
 
         """
-        pos = self.tell()
-        data = self.read(size)
+        if isinstance(self._backing_stream, SourceIO):
+            # never moves the position, even if the window is too small
+            return self._backing_stream.peek_at(self.tell(), size)
 
-        self.seek(pos)
-
-        return data
+        return self.read_at(self.tell(), size)
 
     def seekpeek(self, offset: int, size: int) -> bytes:
         """
@@ -203,71 +549,102 @@ class BaseStream:
             bytes: The data read from the stream.
 
         """
-        pos = self.tell()
-        self.seek(offset)
+        if isinstance(self._backing_stream, SourceIO):
+            return self._backing_stream.peek_at(offset, size)
+
+        return self.read_at(offset, size)
+
+    def _find(self, data: bytes, start: int | None, end: int | None, reverse: bool):
+        if isinstance(self._backing_stream, SourceIO):
+            # streamed sources can only be searched forwards, within the window
+            if reverse:
+                raise io.UnsupportedOperation(
+                    "cannot search a streamed source backwards"
+                )
 
-        data = self.read(size)
-        self.seek(pos)
+            return self._backing_stream.find(
+                data, self.tell() if start is None else start, end
+            )
 
-        return data
+        start, end, _ = slice(
+            self.tell() if start is None else start, end
+        ).indices(self.size())
 
-    def search(self, data: bytes) -> int:
+        if isinstance(self._backing_stream, BufferIO):
+            if reverse:
+                return self._backing_stream.rfind(data, start, end)
+
+            return self._backing_stream.find(data, start, end)
+
+        # getvalue() does not copy unless the BytesIO has exported views
+        if reverse:
+            return self._backing_stream.getvalue().rfind(data, start, end)
+
+        return self._backing_stream.getvalue().find(data, start, end)
+
+    def search(
+        self, data: bytes, start: int | None = None, end: int | None = None
+    ) -> int:
         """
-        Searches for the given data in the backing stream.
+        Searches for the given data in the backing stream. The stream position is
+        left unchanged.
 
         Args:
             data (bytes): The data to search for.
+            start (int, optional): The index to start searching at. Defaults to the
+                current position.
+            end (int, optional): The index to stop searching at. Defaults to the end
+                of the stream.
 
         Returns:
             int: The index of the first occurrence of the data , or -1 if not found.
         """
-        pos = self.tell()
-
-        while True:
-            chunk = self.read(len(data))
-
-            if not chunk:
-                self.seek(pos)
-
-                return -1
-            if chunk == data:
-                index = self.tell() - len(data)
-                self.seek(pos)
+        return self._find(data, start, end, False)
 
-                return index
-
-            self.seek(self.tell() - len(data) + 1)
-
-    def rsearch(self, data: bytes) -> int:
+    def rsearch(
+        self, data: bytes, start: int | None = None, end: int | None = None
+    ) -> int:
         """
         Searches for the given data in the reverse order within the backing stream.
+        The stream position is left unchanged.
 
         Args:
             data (bytes): The data to search for.
+            start (int, optional): The lowest index a match may start at. Defaults
+                to the current position.
+            end (int, optional): The index to start searching backwards from.
+                Defaults to the end of the stream.
 
         Returns:
-            int: The index of the first occurrence of the data, or -1 if not found.
+            int: The index of the last occurrence of the data, or -1 if not found.
         """
-        pos = self.tell()
-        remaining = self.remaining()
+        return self._find(data, start, end, True)
 
-        while remaining > 0:
-            self.seek(remaining, io.SEEK_CUR)
-            chunk = self.read(len(data))
-
-            if not chunk:
-                self.seek(pos)
+    def search_all(
+        self, data: bytes, start: int | None = None, end: int | None = None
+    ) -> typing.Iterator[int]:
+        """
+        Lazily yields the index of every occurrence of the given data, including
+        overlapping ones. The stream position is left unchanged.
 
-                return -1
-            if chunk == data:
-                index = self.tell() - len(data)
-                self.seek(pos)
+        Args:
+            data (bytes): The data to search for.
+            start (int, optional): The index to start searching at. Defaults to the
+                current position.
+            end (int, optional): The index to stop searching at. Defaults to the end
+                of the stream.
 
-                return index
+        Yields:
+            int: The index of each occurrence of the data.
+        """
+        start, end, _ = slice(
+            self.tell() if start is None else start, end
+        ).indices(self.size())
 
-            remaining -= len(data)
+        while start <= end and (index := self._find(data, start, end, False)) != -1:
+            yield index
 
-        return -1
+            start = index + 1
 
     def clear(self):
         """
@@ -0,0 +1,275 @@
+import array
+import typing
+
+from datastream.base import _array_typecodes
+
+if typing.TYPE_CHECKING:
+    from datastream.deserializing import DeserializingStream
+    from datastream.serializing import SerializingStream
+
+
+# number of fields extracted or packed per accumulator refill by the bulk methods
+_BLOCK_FIELDS = 64
+
+
+def _unsigned_typecode(width: int) -> str:
+    # the smallest unsigned array typecode that holds `width` bits
+    for size in (1, 2, 4, 8):
+        if width <= size * 8 and ("u", size) in _array_typecodes:
+            return _array_typecodes["u", size]
+
+    raise ValueError("bit fields wider than 64 bits cannot be stored in an array")
+
+
+class BitReader:
+    """
+    Reads bit fields from a stream. Bytes are loaded into an accumulator a word at
+    a time, so fields are extracted with shifts and masks instead of one byte read
+    each.
+
+    The reader may load bytes ahead of the fields it has returned; call `align`
+    (or leave the `with` block) before reading from the stream directly again.
+
+    Args:
+        stream (DeserializingStream): The stream to read from.
+        msb_first (bool, optional): Whether fields are packed starting from the
+            most significant bit of each byte. If False, they start from the least
+            significant bit. Defaults to True.
+    """
+
+    def __init__(self, stream: "DeserializingStream", msb_first: bool = True):
+        self.stream = stream
+        self.msb_first = msb_first
+        self._acc = 0
+        # number of unread bits in _acc
+        self._count = 0
+
+    def __enter__(self) -> typing.Self:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.align()
+
+    def _refill(self, bits: int):
+        # loads whole bytes until at least `bits` bits are available, reading a
+        # full word at a time when possible
+        needed = (bits - self._count + 7) // 8
+        data = self.stream.read(max(needed, (64 - self._count) // 8))
+
+        if len(data) < needed:
+            self.stream._reposition(self.stream.tell() - len(data))
+
+            raise EOFError(f"not enough data for {bits} bits")
+
+        if self.msb_first:
+            self._acc = (self._acc << len(data) * 8) | int.from_bytes(data, "big")
+        else:
+            self._acc |= int.from_bytes(data, "little") << self._count
+
+        self._count += len(data) * 8
+
+    def read_bits(self, width: int) -> int:
+        """
+        Reads an unsigned field of `width` bits.
+
+        Args:
+            width (int): The width of the field in bits.
+
+        Returns:
+            int: The value of the field.
+        """
+        if self._count < width:
+            self._refill(width)
+
+        self._count -= width
+
+        if self.msb_first:
+            value = self._acc >> self._count
+            self._acc &= (1 << self._count) - 1
+
+            return value
+
+        value = self._acc & ((1 << width) - 1)
+        self._acc >>= width
+
+        return value
+
+    def read_flag(self) -> bool:
+        """
+        Reads a single bit.
+
+        Returns:
+            bool: Whether the bit is set.
+        """
+        return bool(self.read_bits(1))
+
+    def read_bits_array(self, width: int, count: int) -> array.array:
+        """
+        Reads `count` consecutive unsigned fields of `width` bits. The fields are
+        extracted in blocks, with one accumulator refill per block.
+
+        Args:
+            width (int): The width of each field in bits, at most 64.
+            count (int): The number of fields to read.
+
+        Returns:
+            array.array: The values, in the smallest unsigned typecode that holds
+                them.
+        """
+        values = array.array(_unsigned_typecode(width))
+        mask = (1 << width) - 1
+
+        while count > 0:
+            fields = min(count, _BLOCK_FIELDS)
+            bits = fields * width
+
+            if self._count < bits:
+                self._refill(bits)
+
+            acc = self._acc
+            self._count -= bits
+
+            if self.msb_first:
+                shifts = range(self._count + bits - width, self._count - 1, -width)
+                self._acc &= (1 << self._count) - 1
+            else:
+                shifts = range(0, bits, width)
+                self._acc >>= bits
+
+            values.extend([(acc >> shift) & mask for shift in shifts])
+            count -= fields
+
+        return values
+
+    def align(self):
+        """
+        Skips to the next byte boundary and hands the bytes loaded ahead back to
+        the stream, so that the stream position follows the last field read.
+        """
+        unread = self._count // 8
+
+        if unread:
+            self.stream._reposition(self.stream.tell() - unread)
+
+        self._acc = 0
+        self._count = 0
+
+
+class BitWriter:
+    """
+    Writes bit fields to a stream. Fields are collected in an accumulator that is
+    written out a word at a time.
+
+    Call `align` (or leave the `with` block) to write out the last partial byte
+    before writing to the stream directly again.
+
+    Args:
+        stream (SerializingStream): The stream to write to.
+        msb_first (bool, optional): Whether fields are packed starting from the
+            most significant bit of each byte. If False, they start from the least
+            significant bit. Defaults to True.
+    """
+
+    def __init__(self, stream: "SerializingStream", msb_first: bool = True):
+        self.stream = stream
+        self.msb_first = msb_first
+        self._acc = 0
+        # number of pending bits in _acc
+        self._count = 0
+
+    def __enter__(self) -> typing.Self:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.align()
+
+    def _drain(self):
+        # writes out the whole bytes of the accumulator
+        size = self._count // 8
+        bits = size * 8
+
+        if self.msb_first:
+            data = (self._acc >> self._count - bits).to_bytes(size, "big")
+            self._acc &= (1 << self._count - bits) - 1
+        else:
+            data = (self._acc & ((1 << bits) - 1)).to_bytes(size, "little")
+            self._acc >>= bits
+
+        self._count -= bits
+        self.stream.write(data)
+
+    def write_bits(self, width: int, value: int):
+        """
+        Writes `value` as an unsigned field of `width` bits.
+
+        Args:
+            width (int): The width of the field in bits.
+            value (int): The value of the field.
+        """
+        if value < 0 or value >> width:
+            raise ValueError(f"{value} does not fit in {width} unsigned bits")
+
+        if self.msb_first:
+            self._acc = (self._acc << width) | value
+        else:
+            self._acc |= value << self._count
+
+        self._count += width
+
+        if self._count >= 64:
+            self._drain()
+
+    def write_flag(self, value: bool):
+        """
+        Writes a single bit.
+
+        Args:
+            value (bool): Whether the bit is set.
+        """
+        self.write_bits(1, int(value))
+
+    def write_bits_array(self, width: int, values: typing.Iterable[int]):
+        """
+        Writes a sequence of unsigned fields of `width` bits, with one accumulator
+        drain per block of fields.
+
+        Args:
+            width (int): The width of each field in bits.
+            values (typing.Iterable[int]): The values of the fields.
+        """
+        values = list(values)
+
+        if values and (min(values) < 0 or max(values) >> width):
+            raise ValueError(f"values do not fit in {width} unsigned bits")
+
+        for start in range(0, len(values), _BLOCK_FIELDS):
+            block = values[start:start + _BLOCK_FIELDS]
+            acc = 0
+
+            if self.msb_first:
+                for value in block:
+                    acc = (acc << width) | value
+
+                self._acc = (self._acc << width * len(block)) | acc
+            else:
+                for shift, value in enumerate(block):
+                    acc |= value << shift * width
+
+                self._acc |= acc << self._count
+
+            self._count += width * len(block)
+            self._drain()
+
+    def align(self):
+        """
+        Pads the pending bits with zeros up to the next byte boundary and writes
+        them out.
+        """
+        padding = -self._count % 8
+
+        if self.msb_first:
+            self._acc <<= padding
+
+        self._count += padding
+        self._drain()
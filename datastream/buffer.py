@@ -0,0 +1,853 @@
+import contextlib
+import io
+import mmap
+import os
+import struct
+import typing
+
+
+class BufferIO:
+    """
+    A file-like object over any buffer-protocol object (bytes, bytearray, mmap,
+    array, memoryview...). Unlike `io.BytesIO`, the buffer is never copied: the
+    stream holds a memoryview over it and tracks its own offset.
+
+    Writable buffers are written in place and cannot grow. Read-only and shared
+    buffers are copied into a private, growable bytearray on the first write.
+
+    Args:
+        buffer (typing.Any): The object to read from. Must support the buffer
+            protocol.
+        views (bool, optional): Whether `read` returns memoryviews into the buffer
+            instead of new bytes objects. Defaults to False.
+        close_buffer (bool, optional): Whether closing the stream also closes
+            `buffer`, e.g. an mmap owned by the stream. Defaults to False.
+    """
+
+    def __init__(
+        self, buffer: typing.Any, views: bool = False, close_buffer: bool = False
+    ):
+        view = memoryview(buffer)
+
+        if view.format != "B" or view.ndim != 1:
+            view = view.cast("B")
+
+        self._view = view
+        self._pos = 0
+        self._size = len(view)
+        self._views = views
+        self._buffer = buffer if close_buffer else None
+        # _owned: the view is over a private bytearray that may be reallocated
+        # _cow: the view must be copied before it is written to
+        self._owned = False
+        self._cow = view.readonly
+
+        # searches run on the exporting object when it has a C-level find(), at
+        # `_offset` bytes into it
+        if isinstance(buffer, memoryview) and view.nbytes == len(
+            memoryview(buffer.obj).cast("B")
+        ):
+            buffer = buffer.obj
+
+        self._base = buffer if hasattr(buffer, "find") else None
+        self._offset = 0
+        # the file the whole buffer is mapped from, if any
+        self._path: str | None = None
+        self._set_limit()
+
+    @classmethod
+    def with_capacity(cls, capacity: int, views: bool = False) -> "BufferIO":
+        """
+        Returns an empty stream over a private, growable buffer with room for
+        `capacity` bytes before it has to be reallocated.
+
+        Args:
+            capacity (int): The initial capacity of the buffer.
+            views (bool, optional): Whether `read` returns memoryviews into the
+                buffer instead of new bytes objects. Defaults to False.
+
+        Returns:
+            BufferIO: The empty stream.
+        """
+        stream = cls(bytearray(capacity), views)
+        stream._size = 0
+        stream._owned = True
+        stream._set_limit()
+
+        return stream
+
+    @property
+    def closed(self) -> bool:
+        return self._view is None
+
+    def readable(self) -> bool:
+        return True
+
+    def writable(self) -> bool:
+        return not self._view.readonly
+
+    def seekable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes | memoryview:
+        """
+        Reads up to `size` bytes from the buffer. If `size` is negative, reads until
+        the end of the buffer.
+
+        Returns:
+            bytes | memoryview: The bytes read, or a view over them if the stream
+                was created with `views=True`.
+        """
+        if self._views:
+            return self.read_view(size)
+
+        return self.read_view(size).tobytes()
+
+    def read_view(self, size: int = -1) -> memoryview:
+        """
+        Reads up to `size` bytes from the buffer and returns a view over them. If
+        `size` is negative, reads until the end of the buffer.
+
+        Returns:
+            memoryview: A view over the bytes read.
+        """
+        pos = self._pos
+        end = self._size if size < 0 else min(pos + size, self._size)
+
+        if end <= pos:
+            return self._view[0:0]
+
+        self._pos = end
+
+        return self._view[pos:end]
+
+    def unpack(self, compiled: struct.Struct) -> tuple[typing.Any, ...]:
+        """
+        Unpacks `compiled` at the current offset and advances past it.
+
+        Args:
+            compiled (struct.Struct): The compiled format to unpack.
+
+        Returns:
+            tuple: The unpacked values.
+        """
+        pos = self._pos
+        end = pos + compiled.size
+
+        if end > self._size:
+            raise struct.error(
+                f"unpack requires a buffer of {compiled.size} bytes"
+            )
+
+        self._pos = end
+
+        return compiled.unpack_from(self._view, pos)
+
+    def write(self, data: typing.Any) -> int:
+        """
+        Writes `data` at the current offset. Writable buffers that are not owned by
+        the stream are written in place, so the write must fit within them.
+
+        Returns:
+            int: The number of bytes written.
+        """
+        if type(data) is not bytes:
+            data = memoryview(data).cast("B")
+
+        pos = self._pos
+        end = pos + len(data)
+
+        if end > self._limit:
+            self._prepare(end)
+
+        self._view[pos:end] = data
+        self._pos = end
+
+        if end > self._size:
+            self._size = end
+
+        return end - pos
+
+    def pack(self, compiled: struct.Struct, *values: typing.Any):
+        """
+        Packs `values` with `compiled` directly into the buffer at the current
+        offset and advances past them.
+
+        Args:
+            compiled (struct.Struct): The compiled format to pack.
+            *values (typing.Any): The values to pack.
+        """
+        pos = self._pos
+        end = pos + compiled.size
+
+        if end > self._limit:
+            self._pack_slow(compiled, end, values)
+
+            return
+
+        # in place, or appended within the reserved capacity: nothing to prepare,
+        # and nothing to undo if packing fails
+        compiled.pack_into(self._view, pos, *values)
+        self._pos = end
+
+        if end > self._size:
+            self._size = end
+
+    def pack_value(self, compiled: struct.Struct, value: typing.Any):
+        """
+        Packs a single value with `compiled` like `pack`, without the cost of
+        collecting it into a tuple of arguments first.
+
+        Args:
+            compiled (struct.Struct): The compiled format to pack.
+            value (typing.Any): The value to pack.
+        """
+        pos = self._pos
+        end = pos + compiled.size
+
+        if end > self._limit:
+            self._pack_slow(compiled, end, (value,))
+
+            return
+
+        compiled.pack_into(self._view, pos, value)
+        self._pos = end
+
+        if end > self._size:
+            self._size = end
+
+    def _pack_slow(
+        self, compiled: struct.Struct, end: int, values: tuple[typing.Any, ...]
+    ):
+        # packs after copying or growing the buffer, and restores the size if
+        # packing fails
+        size = self._size
+
+        self._prepare(end)
+
+        try:
+            compiled.pack_into(self._view, self._pos, *values)
+        except struct.error:
+            self._size = size
+
+            raise
+
+        self._pos = end
+
+    def _set_limit(self):
+        # writes that end at or before _limit need no preparation: up to the end
+        # of external buffers and the capacity of private ones, none before a
+        # copy-on-write view is copied
+        if self._cow or self._view is None:
+            self._limit = -1
+        elif self._owned:
+            self._limit = len(self._view)
+        else:
+            self._limit = self._size
+
+    def _prepare(self, end: int):
+        # makes the bytes up to `end` writable
+        if self._cow:
+            self._detach(end)
+        elif end > self._size:
+            if not self._owned:
+                raise ValueError("write exceeds the end of the buffer")
+
+            self._reserve(end)
+
+    def _detach(self, size: int):
+        # copy the visible contents into a private buffer of at least `size` bytes
+        storage = bytearray(max(size, self._size))
+        storage[:self._size] = self._view[:self._size]
+
+        self._view = memoryview(storage)
+        self._base = storage
+        self._offset = 0
+        self._owned = True
+        self._cow = False
+        # the contents no longer follow the mapped file
+        self._path = None
+
+        self._fill_gap(size)
+        self._set_limit()
+
+    def _reserve(self, size: int):
+        # grow a private buffer so that `size` bytes are visible
+        if size > len(self._view):
+            storage = bytearray(max(size, len(self._view) * 2))
+            storage[:self._size] = self._view[:self._size]
+
+            # the old storage stays alive for as long as views into it exist
+            self._view = memoryview(storage)
+            self._base = storage
+            self._set_limit()
+
+        self._fill_gap(size)
+
+    def _fill_gap(self, size: int):
+        # bytes between the old end and the write offset read as zeros
+        if self._pos > self._size:
+            self._view[self._size:self._pos] = bytes(self._pos - self._size)
+
+        self._size = max(self._size, size)
+
+    def window(self, start: int, end: int) -> "BufferIO":
+        """
+        Returns a stream over bytes `start` to `end` of this buffer. External
+        buffers are shared with the returned stream; private buffers are copied,
+        since they may be reallocated or overwritten later.
+
+        Args:
+            start (int): The starting index of the window.
+            end (int): The ending index of the window.
+
+        Returns:
+            BufferIO: A stream over the window.
+        """
+        start, end, _ = slice(start, end).indices(self._size)
+        end = max(start, end)
+
+        if self._owned:
+            return BufferIO(self._view[start:end].tobytes(), self._views)
+
+        window = BufferIO(self._view[start:end], self._views)
+        window._base = self._base
+        window._offset = self._offset + start
+        window._cow = window._cow or self._cow
+        window._set_limit()
+
+        return window
+
+    def clone(self) -> "BufferIO":
+        """
+        Returns a copy-on-write copy of this stream, positioned at the start. The
+        contents are only copied once either stream writes to them, except for
+        writable external buffers, which are copied immediately since they can
+        change underneath the clone.
+
+        Returns:
+            BufferIO: The cloned stream.
+        """
+        view = self._view[:self._size]
+
+        if not (self._cow or self._owned):
+            clone = BufferIO(bytearray(view), self._views)
+            clone._owned = True
+            clone._set_limit()
+
+            return clone
+
+        clone = BufferIO(view, self._views)
+        clone._base = self._base
+        clone._offset = self._offset
+        clone._cow = True
+        clone._set_limit()
+        self._cow = True
+        self._set_limit()
+
+        return clone
+
+    def find(self, sub: typing.Any, start: int, end: int) -> int:
+        """
+        Returns the lowest index of `sub` between `start` and `end`, or -1 if it is
+        not found. Both bounds must lie within the buffer.
+        """
+        if self._base is None:
+            index = self._view[start:end].tobytes().find(sub)
+
+            return index if index < 0 else index + start
+
+        index = self._base.find(sub, self._offset + start, self._offset + end)
+
+        return index if index < 0 else index - self._offset
+
+    def rfind(self, sub: typing.Any, start: int, end: int) -> int:
+        """
+        Returns the highest index of `sub` between `start` and `end`, or -1 if it
+        is not found. Both bounds must lie within the buffer.
+        """
+        if self._base is None:
+            index = self._view[start:end].tobytes().rfind(sub)
+
+            return index if index < 0 else index + start
+
+        index = self._base.rfind(sub, self._offset + start, self._offset + end)
+
+        return index if index < 0 else index - self._offset
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self._size + offset
+        else:
+            raise ValueError(f"invalid whence ({whence})")
+
+        if pos < 0:
+            raise ValueError(f"negative seek value {pos}")
+
+        self._pos = pos
+
+        return pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def truncate(self, size: int | None = None) -> int:
+        """
+        Shrinks the visible part of the buffer to `size` bytes. The underlying
+        object is left untouched, except for private buffers, whose dropped bytes
+        are zeroed so that appending past the end never has to.
+        """
+        if size is None:
+            size = self._pos
+
+        if size < self._size:
+            if self._owned and not self._cow:
+                self._view[size:self._size] = bytes(self._size - size)
+
+            self._size = size
+            self._set_limit()
+
+        return self._size
+
+    def getbuffer(self) -> memoryview:
+        """
+        Returns a view over the contents of the buffer without copying them.
+        """
+        return self._view[:self._size]
+
+    def getvalue(self) -> bytes:
+        return self._view[:self._size].tobytes()
+
+    def close(self):
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+            self._set_limit()
+
+        if self._buffer is not None:
+            # substreams may still hold views into the buffer; it is released
+            # once the last of them is gone
+            with contextlib.suppress(BufferError):
+                self._buffer.close()
+
+            self._buffer = None
+
+
+def map_file(path: str | os.PathLike, writable: bool = False) -> BufferIO:
+    """
+    Memory-maps the file at `path` and returns a BufferIO over the mapping. The
+    mapping is closed together with the returned stream.
+
+    Args:
+        path (str | os.PathLike): The path of the file to map.
+        writable (bool, optional): Whether writes go through to the file.
+            Defaults to False.
+
+    Returns:
+        BufferIO: A stream over the mapped file.
+    """
+    with open(path, "r+b" if writable else "rb") as file:
+        # empty files cannot be mapped
+        if os.fstat(file.fileno()).st_size == 0:
+            return BufferIO(bytearray() if writable else b"")
+
+        access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+        mapping = mmap.mmap(file.fileno(), 0, access=access)
+
+    stream = BufferIO(mapping, close_buffer=True)
+    stream._path = os.fspath(path)
+
+    return stream
+
+
+class SourceIO:
+    """
+    A file-like object that reads from a non-seekable source (a socket, pipe,
+    decompressor...) through a bounded lookahead window. Data is pulled from the
+    source on demand, so memory use stays constant regardless of the input size.
+
+    The window limits how far ahead `peek`, `search` and `read_until` can look,
+    and how far back `seek` can go: only the bytes still held in the window can be
+    revisited.
+
+    Args:
+        source (typing.Any): The object to read from. Must provide `readinto`,
+            `recv_into` or `read`.
+        window (int, optional): The size of the lookahead window in bytes.
+            Defaults to 65536.
+    """
+
+    def __init__(self, source: typing.Any, window: int = 65536):
+        if window <= 0:
+            raise ValueError("window must be positive")
+
+        self._source = source
+        self._readinto = getattr(source, "readinto", None) or getattr(
+            source, "recv_into", None
+        )
+        self._window = bytearray(window)
+        # absolute stream offset of _window[0]
+        self._base = 0
+        # number of valid bytes in _window
+        self._end = 0
+        self._pos = 0
+        self._eof = False
+        # called with the offset and a view of the bytes dropped from the window,
+        # before they are overwritten
+        self._taps: list[typing.Callable[[int, memoryview], typing.Any]] = []
+
+    @property
+    def closed(self) -> bool:
+        return self._window is None
+
+    def readable(self) -> bool:
+        return True
+
+    def writable(self) -> bool:
+        return False
+
+    def seekable(self) -> bool:
+        return False
+
+    def _pull(self, view: memoryview) -> int:
+        if self._readinto is not None:
+            return self._readinto(view) or 0
+
+        data = self._source.read(len(view))
+
+        view[:len(data)] = data
+
+        return len(data)
+
+    def _fill(self, size: int) -> int:
+        # makes at least `size` bytes past the current position available, if the
+        # window and the source allow it. returns the number of bytes available.
+        offset = self._pos - self._base
+        available = self._end - offset
+
+        if available >= size or self._eof:
+            return max(available, 0)
+
+        if offset > 0 and len(self._window) - self._end < size - available:
+            # drop everything before the current position to make room
+            if self._taps:
+                with memoryview(self._window) as view:
+                    dropped = view[:min(offset, self._end)]
+
+                    for tap in self._taps:
+                        tap(self._base, dropped)
+
+                    dropped.release()
+
+            if available > 0:
+                self._window[:available] = self._window[offset:self._end]
+
+            self._base = self._pos
+            self._end = max(available, 0)
+            offset = 0
+
+        while self._end - offset < size and self._end < len(self._window):
+            with memoryview(self._window) as view:
+                count = self._pull(view[self._end:])
+
+            if count == 0:
+                self._eof = True
+
+                break
+
+            self._end += count
+
+        return max(self._end - offset, 0)
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Reads up to `size` bytes. If `size` is negative, reads until the source is
+        exhausted.
+
+        Returns:
+            bytes: The bytes read.
+        """
+        chunks = []
+
+        while size != 0:
+            limit = len(self._window) if size < 0 else min(size, len(self._window))
+            available = min(self._fill(limit), limit)
+
+            if available == 0:
+                break
+
+            offset = self._pos - self._base
+
+            chunks.append(bytes(self._window[offset:offset + available]))
+            self._pos += available
+
+            if size > 0:
+                size -= available
+
+        return b"".join(chunks)
+
+    def read_view(self, size: int = -1) -> bytes:
+        # the window is reused as the stream advances, so views cannot be handed
+        # out
+        return self.read(size)
+
+    def peek_at(self, offset: int, size: int) -> bytes:
+        """
+        Returns up to `size` bytes at `offset` without moving the position. The
+        bytes from the position to the end of the peeked range must fit in the
+        window.
+
+        Args:
+            offset (int): The offset to peek at.
+            size (int): The maximum number of bytes to peek.
+
+        Returns:
+            bytes: The bytes peeked.
+        """
+        if offset < self._base:
+            raise io.UnsupportedOperation("cannot peek before the buffered window")
+
+        start = min(offset, self._pos)
+
+        if size < 0 or offset + size - start > len(self._window):
+            raise ValueError(
+                f"cannot peek {size} bytes at {offset} through a window of "
+                f"{len(self._window)} bytes"
+            )
+
+        pos = self._pos
+        # keep everything from `start` on in the window while refilling it
+        self._pos = start
+
+        try:
+            self._fill(offset + size - start)
+        finally:
+            self._pos = pos
+
+        begin = offset - self._base
+
+        return bytes(self._window[begin:max(min(begin + size, self._end), begin)])
+
+    def unpack(self, compiled: struct.Struct) -> tuple[typing.Any, ...]:
+        """
+        Unpacks `compiled` at the current offset and advances past it.
+
+        Args:
+            compiled (struct.Struct): The compiled format to unpack.
+
+        Returns:
+            tuple: The unpacked values.
+        """
+        if self._fill(compiled.size) < compiled.size:
+            raise struct.error(f"unpack requires a buffer of {compiled.size} bytes")
+
+        values = compiled.unpack_from(self._window, self._pos - self._base)
+        self._pos += compiled.size
+
+        return values
+
+    def find(self, sub: typing.Any, start: int, end: int | None = None) -> int:
+        """
+        Returns the lowest index of `sub` at or after `start` and before `end`, or
+        -1 if it is not found within the lookahead window.
+        """
+        if start < self._base:
+            raise io.UnsupportedOperation("cannot search before the buffered window")
+
+        pos = self._pos
+        # keep everything from `start` on in the window while refilling it
+        self._pos = min(pos, start)
+
+        try:
+            while True:
+                stop = self._end if end is None else min(end - self._base, self._end)
+                index = self._window.find(sub, start - self._base, stop)
+
+                if index >= 0:
+                    return index + self._base
+
+                if end is not None and self._base + self._end >= end:
+                    return -1
+
+                scanned = self._base + stop
+                available = self._end - (self._pos - self._base)
+
+                if self._fill(available + 1) <= available:
+                    return -1
+
+                # only rescan the part that can overlap the new data
+                start = max(start, scanned - len(sub) + 1)
+        finally:
+            self._pos = pos
+
+    def write(self, data: typing.Any) -> int:
+        raise io.UnsupportedOperation("write")
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        else:
+            raise io.UnsupportedOperation("cannot seek relative to the end")
+
+        if pos < self._base:
+            raise io.UnsupportedOperation("cannot seek before the buffered window")
+
+        # skip forward by reading and discarding
+        while pos > self._base + self._end and not self._eof:
+            self._pos = self._base + self._end
+            self._fill(min(pos - self._pos, len(self._window)))
+
+        self._pos = pos
+
+        return pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def truncate(self, size: int | None = None) -> int:
+        raise io.UnsupportedOperation("truncate")
+
+    def getbuffer(self) -> memoryview:
+        raise io.UnsupportedOperation("the size of a streamed source is unknown")
+
+    def getvalue(self) -> bytes:
+        raise io.UnsupportedOperation("the size of a streamed source is unknown")
+
+    def close(self):
+        self._window = None
+
+
+class GatherIO:
+    """
+    An append-only file-like object that keeps its contents as a list of
+    segments instead of one contiguous buffer. Small writes are collected in a
+    scratch bytearray, while writes of at least `threshold` bytes are referenced
+    as they are rather than copied, so that they can be handed to `os.writev` or
+    `socket.sendmsg` along with the rest.
+
+    Referenced buffers must not be modified until the stream has been flushed,
+    and bytearrays cannot be resized while the stream references them.
+
+    Args:
+        threshold (int, optional): The size from which writes are referenced
+            instead of copied. Defaults to 4096.
+    """
+
+    def __init__(self, threshold: int = 4096):
+        self._threshold = threshold
+        self._segments: list[typing.Any] = []
+        self._scratch = bytearray()
+        self._size = 0
+
+    @property
+    def closed(self) -> bool:
+        return self._segments is None
+
+    def readable(self) -> bool:
+        return False
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def read(self, size: int = -1) -> bytes:
+        # the position is always at the end of the stream
+        return b""
+
+    def write(self, data: typing.Any) -> int:
+        view = memoryview(data)
+
+        if view.nbytes < self._threshold:
+            self._scratch += view
+        else:
+            if self._scratch:
+                self._segments.append(self._scratch)
+                self._scratch = bytearray()
+
+            self._segments.append(view if view.format == "B" else view.cast("B"))
+
+        self._size += view.nbytes
+
+        return view.nbytes
+
+    def pack(self, compiled: struct.Struct, *values: typing.Any):
+        """
+        Packs `values` with `compiled` at the end of the stream.
+
+        Args:
+            compiled (struct.Struct): The compiled format to pack with.
+            *values (typing.Any): The values to pack.
+        """
+        self._scratch += compiled.pack(*values)
+        self._size += compiled.size
+
+    def pack_value(self, compiled: struct.Struct, value: typing.Any):
+        """
+        Packs a single value with `compiled` at the end of the stream.
+
+        Args:
+            compiled (struct.Struct): The compiled format to pack with.
+            value (typing.Any): The value to pack.
+        """
+        self._scratch += compiled.pack(value)
+        self._size += compiled.size
+
+    def segments(self) -> list[typing.Any]:
+        """
+        Returns the segments that make up the contents of the stream, in order.
+
+        Returns:
+            list: The segments, as bytes-like objects.
+        """
+        if self._scratch:
+            # later writes go to a new scratch buffer so the returned one stays
+            # valid
+            self._segments.append(self._scratch)
+            self._scratch = bytearray()
+
+        return list(self._segments)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        # the position is always at the end, so SEEK_CUR and SEEK_END agree
+        pos = offset if whence == io.SEEK_SET else self._size + offset
+
+        if pos != self._size:
+            raise io.UnsupportedOperation("a gathered stream can only be appended to")
+
+        return pos
+
+    def tell(self) -> int:
+        return self._size
+
+    def truncate(self, size: int | None = None) -> int:
+        if size == 0:
+            self._segments = []
+            self._scratch = bytearray()
+            self._size = 0
+        elif size is not None and size != self._size:
+            raise io.UnsupportedOperation("a gathered stream can only be cleared")
+
+        return self._size
+
+    def getbuffer(self) -> memoryview:
+        # the segments are not contiguous, so they have to be joined
+        return memoryview(self.getvalue())
+
+    def getvalue(self) -> bytes:
+        return b"".join(self.segments())
+
+    def close(self):
+        for segment in self._segments or ():
+            if isinstance(segment, memoryview):
+                segment.release()
+
+        self._segments = None
+        self._scratch = None
@@ -0,0 +1,133 @@
+import typing
+
+from datastream.buffer import SourceIO
+
+
+class Checksum:
+    """
+    A running checksum or hash over a region of a stream, as returned by
+    `BaseStream.checksum`. The region starts at the stream position when the
+    `with` block is entered and ends at the furthest position reached while it is
+    active, whether by reading, writing or seeking: seeking back, e.g. to read a
+    header again, does not take bytes out of it. Bytes that readers such as
+    `BitReader` load ahead and hand back are not part of it.
+
+    The bytes are hashed straight from the backing buffer in the order they appear
+    in the stream, without copying them, as the position moves back, as `value` is
+    read and when the block is left, so rewriting bytes the position has already
+    moved back from does not change the result. Sources streamed through a window
+    are hashed before the window drops them.
+
+    Args:
+        stream (typing.Any): The stream to hash.
+        function (typing.Any): Either a checksum function taking the data and the
+            running value, like `zlib.crc32` and `zlib.adler32`, a hash
+            constructor like `hashlib.sha256`, or a hash object with an `update`
+            method.
+    """
+
+    def __init__(self, stream: typing.Any, function: typing.Any):
+        self._stream = stream
+        self._function = None
+        self._hash = None
+
+        if hasattr(function, "update"):
+            self._hash = function
+        else:
+            # crc32(b"") and adler32(b"") are their initial values
+            state = function(b"")
+
+            if hasattr(state, "update"):
+                self._hash = state
+            else:
+                self._function = function
+                self._value = state
+
+        self._start = None
+        # absolute offset up to which the region has been hashed
+        self._hashed = None
+        self._active = False
+
+    def __enter__(self) -> typing.Self:
+        if self._start is not None:
+            raise ValueError("a checksum can only cover one region")
+
+        self._start = self._hashed = self._stream.tell()
+        self._active = True
+        self._stream._checksums = (*self._stream._checksums, self)
+
+        if isinstance(self._stream._backing_stream, SourceIO):
+            self._stream._backing_stream._taps.append(self._discard)
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self._update(self._stream.tell())
+        finally:
+            self._active = False
+            self._stream._checksums = tuple(
+                checksum for checksum in self._stream._checksums if checksum is not self
+            )
+
+            if isinstance(self._stream._backing_stream, SourceIO):
+                self._stream._backing_stream._taps.remove(self._discard)
+
+    def _add(self, data: typing.Any):
+        if self._function is not None:
+            self._value = self._function(data, self._value)
+        else:
+            self._hash.update(data)
+
+    def _update(self, end: int):
+        if end <= self._hashed:
+            return
+
+        for view in self._stream._iter_views(self._hashed, end):
+            self._add(view)
+
+        self._hashed = end
+
+    def _discard(self, base: int, view: memoryview):
+        # called by SourceIO before it drops the bytes at [base, base + len(view))
+        # from its window
+        if self._hashed < base + len(view):
+            with view[max(self._hashed - base, 0):] as part:
+                self._add(part)
+
+            self._hashed = base + len(view)
+
+    @property
+    def start(self) -> int:
+        """
+        The offset of the start of the region.
+        """
+        return self._start
+
+    @property
+    def value(self) -> int | bytes:
+        """
+        The checksum of the region so far, or the digest if a hash constructor or
+        object was given.
+        """
+        if self._active:
+            self._update(self._stream.tell())
+
+        if self._function is not None:
+            return self._value
+
+        return self._hash.digest()
+
+    def hexdigest(self) -> str:
+        """
+        Returns the checksum of the region so far as a hex string.
+
+        Returns:
+            str: The hex string, 8 digits for 32-bit checksum functions.
+        """
+        value = self.value
+
+        if isinstance(value, int):
+            return f"{value:08x}"
+
+        return value.hex()
@@ -0,0 +1,203 @@
+import dataclasses
+import typing
+
+from datastream.base import _prefix_format, _signed_bits, _type_formats
+from datastream.record import _varint_types
+
+
+class FieldType:
+    """
+    The stream type of a codec field, given as `typing.Annotated` metadata.
+
+    Args:
+        kind (str): One of the typed method names ("int8" through "uint64",
+            "float", "double", "bool", "uleb128" or "sleb128"), "string" or
+            "bytes".
+        prefix (str, optional): The length prefix of strings and blobs. Defaults
+            to "uleb128".
+        encoding (str, optional): The encoding of strings. Defaults to "utf-8".
+    """
+
+    def __init__(self, kind: str, prefix: str = "uleb128", encoding: str = "utf-8"):
+        if kind in ("string", "bytes"):
+            _prefix_format(prefix)
+        elif kind not in _type_formats and kind not in _varint_types:
+            raise ValueError(f"unsupported field type: {kind!r}")
+
+        self.kind = kind
+        self.prefix = prefix
+        self.encoding = encoding
+
+    def __repr__(self) -> str:
+        if self.kind == "string":
+            return f"FieldType('string', {self.prefix!r}, {self.encoding!r})"
+
+        if self.kind == "bytes":
+            return f"FieldType('bytes', {self.prefix!r})"
+
+        return f"FieldType({self.kind!r})"
+
+
+Int8 = FieldType("int8")
+UInt8 = FieldType("uint8")
+Int16 = FieldType("int16")
+UInt16 = FieldType("uint16")
+Int32 = FieldType("int32")
+UInt32 = FieldType("uint32")
+Int64 = FieldType("int64")
+UInt64 = FieldType("uint64")
+Float = FieldType("float")
+Double = FieldType("double")
+Bool = FieldType("bool")
+ULeb128 = FieldType("uleb128")
+SLeb128 = FieldType("sleb128")
+
+# length-prefixed strings and blobs, usable directly as annotations
+ULeb128Str = typing.Annotated[str, FieldType("string")]
+ULeb128Bytes = typing.Annotated[bytes, FieldType("bytes")]
+
+
+def _field_type(cls: type, name: str, hint: typing.Any) -> FieldType | type:
+    # returns the FieldType of a field, or the codec class of a nested message
+    for metadata in getattr(hint, "__metadata__", ()):
+        if isinstance(metadata, FieldType):
+            return metadata
+
+    if hasattr(hint, "from_stream") and hasattr(hint, "to_stream"):
+        return hint
+
+    raise TypeError(
+        f"field {name!r} of {cls.__name__} has no stream type; annotate it as "
+        "Annotated[..., FieldType] or with a codec class"
+    )
+
+
+def _fixed_lines(
+    run: list[tuple[str, int, str]], read: list[str], write: list[str]
+):
+    # appends the lines reading and writing a run of fixed-width fields with one
+    # struct call
+    fmt = "".join(char for char, _, _ in run)
+    targets = "".join(f"_{index}, " for _, index, _ in run)
+    arguments = []
+
+    for char, index, name in run:
+        if char in _signed_bits:
+            write.extend(_wrap_lines(index, name, _signed_bits[char]))
+            arguments.append(f"_{index}")
+        else:
+            arguments.append(f"self.{name}")
+
+    read.append(f"    {targets}= stream._unpack(structs[{fmt!r}])")
+    write.append(f"    stream._pack(structs[{fmt!r}], {', '.join(arguments)})")
+
+
+def _wrap_lines(index: int, name: str, bits: int) -> list[str]:
+    # signed values past the maximum wrap around, as the typed writers do
+    return [
+        f"    _{index} = self.{name}",
+        f"    if _{index} > 0x{(1 << bits - 1) - 1:X}:",
+        f"        _{index} = -0x{1 << bits:X} + _{index}",
+    ]
+
+
+def _field_lines(index: int, name: str, field_type: FieldType) -> tuple[str, str]:
+    # returns the lines reading and writing a variable-width field
+    if field_type.kind in _varint_types:
+        return (
+            f"    _{index} = stream.read_{field_type.kind}()",
+            f"    stream.write_{field_type.kind}(self.{name})",
+        )
+
+    if field_type.kind == "string":
+        args = f"{field_type.encoding!r}, {field_type.prefix!r}"
+
+        return (
+            f"    _{index} = stream.read_string({args})",
+            f"    stream.write_string(self.{name}, {args})",
+        )
+
+    return (
+        f"    _{index} = stream.read_bytes_prefixed({field_type.prefix!r})",
+        f"    stream.write_bytes_prefixed(self.{name}, {field_type.prefix!r})",
+    )
+
+
+def _generate(
+    names: list[str], types: list[FieldType | type]
+) -> tuple[str, dict[str, typing.Any]]:
+    # returns the source of from_stream and to_stream, and the globals it needs
+    # decoded values are held in locals named _0, _1... after the field index, and
+    # nested codec classes are global as _codec_0... so no field name can clash
+    read = ["def from_stream(cls, stream):", "    structs = stream._structs.packed"]
+    write = ["def to_stream(self, stream):", "    structs = stream._structs.packed"]
+    namespace: dict[str, typing.Any] = {}
+    run: list[tuple[str, int, str]] = []
+
+    for index, (name, field_type) in enumerate(zip(names, types, strict=True)):
+        if not isinstance(field_type, type) and field_type.kind in _type_formats:
+            run.append((_type_formats[field_type.kind], index, name))
+
+            continue
+
+        # merges the pending fixed-width fields into one struct call
+        if run:
+            _fixed_lines(run, read, write)
+            run.clear()
+
+        if isinstance(field_type, type):
+            namespace[f"_codec_{index}"] = field_type
+            read.append(f"    _{index} = _codec_{index}.from_stream(stream)")
+            write.append(f"    self.{name}.to_stream(stream)")
+        else:
+            read_line, write_line = _field_lines(index, name, field_type)
+            read.append(read_line)
+            write.append(write_line)
+
+    if run:
+        _fixed_lines(run, read, write)
+
+    decoded = ", ".join(f"_{index}" for index in range(len(names)))
+    read.append(f"    return cls({decoded})")
+
+    if not names:
+        write.append("    pass")
+
+    return "\n".join(read) + "\n\n" + "\n".join(write) + "\n", namespace
+
+
+def codec(cls: type) -> type:
+    """
+    Turns `cls` into a slotted dataclass with generated `from_stream` and
+    `to_stream` methods. The stream type of each field is taken from its
+    annotation, either `typing.Annotated` metadata or another codec class:
+
+        @codec
+        class Header:
+            magic: Annotated[int, UInt32]
+            version: Annotated[int, UInt16]
+            name: ULeb128Str
+
+    The methods are compiled from generated source once, when the class is
+    defined. Consecutive fixed-width fields are read and written with a single
+    struct call.
+
+    Args:
+        cls (type): The class to turn into a codec.
+
+    Returns:
+        type: The codec class.
+    """
+    cls = dataclasses.dataclass(slots=True)(cls)
+    hints = typing.get_type_hints(cls, include_extras=True)
+    names = [field.name for field in dataclasses.fields(cls)]
+    types = [_field_type(cls, name, hints[name]) for name in names]
+
+    source, namespace = _generate(names, types)
+    exec(compile(source, f"<codec {cls.__qualname__}>", "exec"), namespace) # noqa: S102
+
+    cls.from_stream = classmethod(namespace["from_stream"])
+    cls.to_stream = namespace["to_stream"]
+    cls.__codec_source__ = source
+
+    return cls
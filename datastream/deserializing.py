@@ -1,82 +1,721 @@
+import array
 import io
+import os
 import struct
+import sys
 import typing
 
-from datastream.base import BaseStream, ByteOrder
+from datastream.base import (
+    BaseStream,
+    ByteOrder,
+    _array_typecode,
+    _prefix_format,
+    _type_formats,
+)
+from datastream.buffer import BufferIO, SourceIO, map_file
+from datastream.index import RecordIndex, _load_offsets
+from datastream.record import Record
+
+# runs of at least this many bytes are decoded with numpy when it is loaded
+_NUMPY_LEB128_THRESHOLD = 4096
+
+
+def _decode_leb128(
+    buffer: bytes | memoryview, pos: int, end: int, count: int, signed: bool
+) -> tuple[list[int], int]:
+    # decodes up to `count` complete values (all of them if negative) from
+    # buffer[pos:end]. returns the values and the offset after the last one.
+    values = []
+    append = values.append
+
+    while count != 0 and pos < end:
+        start = pos
+        byte = buffer[pos]
+        value = byte & 0x7F
+        shift = 7
+        pos += 1
+
+        while byte & 0x80:
+            if pos >= end:
+                # truncated value, leave it for the caller to resume from
+                return values, start
+
+            byte = buffer[pos]
+            value |= (byte & 0x7F) << shift
+            shift += 7
+            pos += 1
+
+        if signed and byte & 0x40:
+            value -= 1 << shift
+
+        append(value)
+        count -= 1
+
+    return values, pos
+
+
+def _leb128_value(data: bytearray, signed: bool) -> int:
+    # decodes one value read byte by byte, as the async readers do. the last byte
+    # still has its continuation bit set if they stopped at their byte limit.
+    data[-1] &= 0x7F
+
+    return _decode_leb128(data, 0, len(data), 1, signed)[0][0]
+
+
+def _decode_leb128_numpy(
+    np: typing.Any,
+    buffer: bytes | memoryview,
+    pos: int,
+    end: int,
+    count: int,
+    signed: bool,
+) -> tuple[list[int], int] | None:
+    # vectorized version of _decode_leb128. returns None if a value does not fit
+    # in 64 bits.
+    size = end - pos
+
+    if count >= 0:
+        # values that fit in 64 bits take at most 9 bytes
+        size = min(size, count * 9)
+
+    data = np.frombuffer(buffer, np.uint8, size, pos)
+    # every byte without the continuation bit ends a value
+    ends = np.flatnonzero(data < 0x80)
+
+    if count >= 0:
+        ends = ends[:count]
+
+        if len(ends) < count and size < end - pos:
+            return None
+
+    if not len(ends):
+        return [], pos
+
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    lengths = ends - starts + 1
+
+    if lengths.max() > 9:
+        return None
+
+    used = int(ends[-1]) + 1
+    shifts = (np.arange(used) - np.repeat(starts, lengths)).astype(np.uint64) * 7
+    parts = (data[:used] & 0x7F).astype(np.uint64) << shifts
+    values = np.add.reduceat(parts, starts)
+
+    if signed:
+        negative = (data[ends] & 0x40).astype(bool)
+        values[negative] -= np.uint64(1) << lengths[negative].astype(np.uint64) * 7
+        values = values.view(np.int64)
+
+    return values.tolist(), pos + used
+
+
+def _as_backing_stream(
+    buffer: bytes | typing.IO[bytes] | BufferIO | SourceIO,
+) -> io.BytesIO | BufferIO | SourceIO:
+    if isinstance(buffer, io.BytesIO | BufferIO | SourceIO):
+        return buffer
+
+    if isinstance(buffer, io.IOBase):
+        if hasattr(buffer, "getvalue"):
+            return io.BytesIO(buffer.getvalue())
+
+        # files, sockets, pipes... are read incrementally
+        return SourceIO(buffer)
+
+    return io.BytesIO(buffer) # type: ignore
 
 
 class DeserializingStream(BaseStream):
     def __init__(
-        self, buffer: bytes | typing.IO[bytes], byteorder: int = ByteOrder.NATIVE_ENDIAN
+        self,
+        buffer: bytes | typing.IO[bytes] | BufferIO | SourceIO,
+        byteorder: int = ByteOrder.NATIVE_ENDIAN,
     ):
         if buffer is None:
             super().__init__(buffer, byteorder)
 
             return
 
-        if not isinstance(buffer, io.BytesIO):
-            if isinstance(buffer, io.IOBase):
-                buffer = io.BytesIO(buffer.getvalue()) # type: ignore
-            else:
-                buffer = io.BytesIO(buffer) # type: ignore
+        super().__init__(_as_backing_stream(buffer), byteorder)
 
-        super().__init__(buffer, byteorder)
+    @classmethod
+    def from_buffer(
+        cls,
+        buffer: typing.Any,
+        byteorder: int = ByteOrder.NATIVE_ENDIAN,
+        views: bool = False,
+    ) -> typing.Self:
+        """
+        Creates a stream that reads directly from `buffer` without copying it.
+        Any object supporting the buffer protocol is accepted (bytes, bytearray,
+        mmap, array, memoryview...).
 
-    def set(self, buffer: bytes | typing.IO[bytes]):
-        if not isinstance(buffer, io.BytesIO):
-            if isinstance(buffer, io.IOBase):
-                self._backing_stream = io.BytesIO(buffer.getvalue()) # type: ignore
-            else:
-                self._backing_stream = io.BytesIO(buffer) # type: ignore
-        else:
-            self._backing_stream = buffer
+        Args:
+            buffer (typing.Any): The object to read from.
+            byteorder (int, optional): The byte order of the stream. Defaults to
+                ByteOrder.NATIVE_ENDIAN.
+            views (bool, optional): Whether `read` returns memoryviews into the
+                buffer instead of new bytes objects. Defaults to False.
+
+        Returns:
+            typing.Self: A stream reading from `buffer`.
+        """
+        return cls(BufferIO(buffer, views), byteorder)
+
+    @classmethod
+    def from_file(
+        cls, path: str | os.PathLike, byteorder: int = ByteOrder.NATIVE_ENDIAN
+    ) -> typing.Self:
+        """
+        Creates a stream over a read-only memory mapping of the file at `path`. The
+        file is paged in by the OS as it is read instead of being loaded up front.
+
+        Args:
+            path (str | os.PathLike): The path of the file to read.
+            byteorder (int, optional): The byte order of the stream. Defaults to
+                ByteOrder.NATIVE_ENDIAN.
+
+        Returns:
+            typing.Self: A stream reading from the mapped file.
+        """
+        return cls(map_file(path), byteorder)
+
+    @classmethod
+    def from_source(
+        cls,
+        source: typing.Any,
+        byteorder: int = ByteOrder.NATIVE_ENDIAN,
+        window: int = 65536,
+    ) -> typing.Self:
+        """
+        Creates a stream that pulls data from `source` on demand through a bounded
+        lookahead window, so that decoding can start before the input has fully
+        arrived and memory use stays constant. `peek`, `search` and `read_until`
+        can only look `window` bytes ahead, and `seek` can only go back to the
+        start of the window.
+
+        Args:
+            source (typing.Any): The object to read from, e.g. a socket, pipe or
+                `gzip.GzipFile`. Must provide `readinto`, `recv_into` or `read`.
+            byteorder (int, optional): The byte order of the stream. Defaults to
+                ByteOrder.NATIVE_ENDIAN.
+            window (int, optional): The size of the lookahead window in bytes.
+                Defaults to 65536.
+
+        Returns:
+            typing.Self: A stream reading from `source`.
+        """
+        return cls(SourceIO(source, window), byteorder)
+
+    def set(self, buffer: bytes | typing.IO[bytes] | BufferIO | SourceIO):
+        self._set_backing_stream(_as_backing_stream(buffer))
 
     def read_format(self, fmt: str) -> typing.Any:
-        return struct.unpack(self._byteorder + fmt, self.read(struct.calcsize(fmt)))[0]
+        return self._unpack(self._structs[fmt])[0]
+
+    def read_format_at(self, fmt: str, offset: int) -> typing.Any:
+        """
+        Reads a value of format `fmt` at `offset` without using or moving the
+        stream position, like `os.pread`. The read_*_at methods are safe to call
+        from several threads at once.
+
+        Args:
+            fmt (str): The struct format of the value.
+            offset (int): The offset to read at.
+
+        Returns:
+            typing.Any: The value read.
+        """
+        if offset < 0:
+            raise ValueError(f"negative offset: {offset}")
+
+        if self._appends and isinstance(self._backing_stream, io.BytesIO):
+            # see BaseStream.read_at
+            with self._backing_stream.getbuffer() as buffer:
+                return self._structs[fmt].unpack_from(buffer, offset)[0]
+
+        return self._structs[fmt].unpack_from(self._getbuffer(), offset)[0]
+
+    def read_array(
+        self, fmt: str, count: int, numpy: bool = False
+    ) -> array.array | typing.Any:
+        """
+        Reads `count` consecutive values of the same type with a single decode call.
+
+        Args:
+            fmt (str): The type of the values, either a struct format character
+                ("I") or a type name ("uint32").
+            count (int): The number of values to read.
+            numpy (bool, optional): Whether to return a NumPy array instead of an
+                `array.array`. Requires NumPy. Defaults to False.
+
+        Returns:
+            array.array | numpy.ndarray: The values read.
+        """
+        if count < 0:
+            raise ValueError(f"negative count: {count}")
+
+        fmt = _type_formats.get(fmt, fmt)
+        itemsize = self._structs[fmt].size
+        typecode = _array_typecode(fmt, itemsize)
+        data = self._read_view(itemsize * count)
+
+        if len(data) != itemsize * count:
+            raise struct.error(
+                f"unpack requires a buffer of {itemsize * count} bytes"
+            )
+
+        if numpy:
+            import numpy as np
+
+            dtype = np.dtype(typecode).newbyteorder(self._structs.numpy_byteorder)
+
+            return np.frombuffer(data, dtype, count)
+
+        values = array.array(typecode)
+        values.frombytes(data)
+
+        if self._structs.byteswap:
+            values.byteswap()
+
+        return values
+
+    def read_record(self, record: Record) -> tuple:
+        """
+        Reads a record laid out as described by `record`.
+
+        Args:
+            record (Record): The layout of the record.
+
+        Returns:
+            tuple: The record, as an instance of `record.type`.
+        """
+        return record.read(self)
+
+    def iter_records(self, record: Record, count: int) -> typing.Iterator[tuple]:
+        """
+        Returns an iterator over `count` consecutive records laid out as described
+        by `record`. Fixed-size records are read in one block and unpacked lazily
+        with `struct.iter_unpack`; other records are read as they are iterated.
+
+        Args:
+            record (Record): The layout of the records.
+            count (int): The number of records to read.
+
+        Returns:
+            typing.Iterator[tuple]: The records, as instances of `record.type`.
+        """
+        if record.format is None:
+            return (record.read(self) for _ in range(count))
+
+        compiled = self._structs.packed[record.format]
+        data = self._read_view(compiled.size * count)
+
+        if len(data) != compiled.size * count:
+            raise struct.error(
+                f"unpack requires a buffer of {compiled.size * count} bytes"
+            )
+
+        return map(record.type._make, compiled.iter_unpack(data))
+
+    def index_records(
+        self,
+        record: Record | str,
+        count: int = -1,
+        path: str | os.PathLike | None = None,
+    ) -> RecordIndex:
+        """
+        Indexes `count` consecutive records starting at the current position and
+        returns a lazy sequence over them. The records are decoded only when they
+        are accessed; finding them costs one pass over the stream, or none for
+        fixed-size records. The stream position is left unchanged.
+
+        Args:
+            record (Record | str): The layout of the records, or the type of the
+                length prefix of length-prefixed blobs ("uleb128", "uint8",
+                "uint16" or "uint32").
+            count (int, optional): The number of records, or -1 to index until the
+                end of the stream. Defaults to -1.
+            path (str | os.PathLike, optional): An index file to reuse. If it exists
+                and was saved for the same record layout, byte order, start
+                position and count, and for a stream of the same size and file
+                modification time (or the same CRC32, for streams that are not
+                mapped read-only from a file), the offsets are loaded from it
+                instead of being computed; otherwise they are saved to it.
+                Defaults to None.
+
+        Returns:
+            RecordIndex: The sequence of records.
+        """
+        size = self.size()
+        start = self.tell()
+        requested = count
+        offsets = None
+
+        if path is not None:
+            offsets = _load_offsets(path, self, record, start, requested)
+
+        if offsets is not None:
+            return RecordIndex(self, record, offsets, start, requested)
+        record_size = record.size if isinstance(record, Record) else None
+
+        if record_size is not None:
+            if count < 0:
+                count = (size - start) // record_size
+            elif start + count * record_size > size:
+                raise struct.error(
+                    f"unpack requires a buffer of {count * record_size} bytes"
+                )
+
+            offsets = array.array(
+                "Q", range(start, start + count * record_size, record_size)
+            )
+        else:
+            offsets = array.array("Q")
+
+            try:
+                while count != 0 and self.tell() < size:
+                    offsets.append(self.tell())
+
+                    if isinstance(record, Record):
+                        record.read(self)
+                    else:
+                        # skip the blob without reading it
+                        length = self._read_length(record)
+                        self._reposition(self.tell() + length)
+
+                    count -= 1
+
+                if count > 0 or self.tell() > size:
+                    raise struct.error("not enough data for the requested records")
+            finally:
+                self._reposition(start)
+
+        index = RecordIndex(self, record, offsets, start, requested)
+
+        if path is not None:
+            index.save(path)
+
+        return index
+
+    def read_until(
+        self,
+        terminator: bytes,
+        max_length: int = -1,
+        include_terminator: bool = True,
+    ) -> bytes:
+        """
+        Reads up to and including the next occurrence of `terminator`. The
+        terminator is located with a single search of the backing buffer, and the
+        stream position is left unchanged if it is not found.
+
+        Args:
+            terminator (bytes): The byte sequence that ends the data.
+            max_length (int, optional): The maximum number of bytes to read before
+                the terminator, or -1 for no limit. Defaults to -1.
+            include_terminator (bool, optional): Whether the terminator is included
+                in the returned data. It is consumed either way. Defaults to True.
+
+        Raises:
+            EOFError: If the stream ends before the terminator is found.
+            ValueError: If the terminator is not found within `max_length` bytes,
+                or within the lookahead window of a streamed source.
+
+        Returns:
+            bytes: The data read.
+        """
+        pos = self.tell()
+        end = None if max_length < 0 else pos + max_length + len(terminator)
+        index = self._find(terminator, pos, end, False)
+
+        if index == -1:
+            backing = self._backing_stream
+            source = backing if isinstance(backing, SourceIO) else None
+
+            if (
+                end is not None
+                and (source is None or end - pos <= len(source._window))
+                and len(self.peek(end - pos)) == end - pos
+            ):
+                raise ValueError(f"terminator not found within {max_length} bytes")
+
+            if source is not None and not source._eof:
+                # the data goes on past what a streamed source can look ahead
+                raise ValueError(
+                    "terminator not found within the lookahead window of "
+                    f"{len(source._window)} bytes"
+                )
+
+            raise EOFError("terminator not found before the end of the stream")
+
+        if include_terminator:
+            return self.read(index - pos + len(terminator))
 
-    def read_until(self, terminator: bytes) -> bytes:
-        data = b""
+        data = self.read(index - pos)
+        self.seek(len(terminator), io.SEEK_CUR)
 
-        while (byte := self.read(len(terminator))) != terminator:
-            data += byte
+        return data
+
+    def read_cstring(self, encoding: str = "utf-8", max_length: int = -1) -> str:
+        """
+        Reads a NUL-terminated string. The terminator is consumed but not returned.
+
+        Args:
+            encoding (str, optional): The encoding of the string. Must not use NUL
+                bytes inside characters. Defaults to "utf-8".
+            max_length (int, optional): The maximum length of the string in bytes,
+                or -1 for no limit. Defaults to -1.
+
+        Returns:
+            str: The decoded string.
+        """
+        return self.read_until(b"\x00", max_length, False).decode(encoding)
+
+    def read_line(
+        self, encoding: str = "utf-8", keepends: bool = False, max_length: int = -1
+    ) -> str:
+        """
+        Reads a line terminated by a newline. Unless `keepends` is set, the line
+        ending is stripped, including a preceding carriage return.
+
+        Args:
+            encoding (str, optional): The encoding of the line. Defaults to "utf-8".
+            keepends (bool, optional): Whether the line ending is kept. Defaults to
+                False.
+            max_length (int, optional): The maximum length of the line in bytes, or
+                -1 for no limit. Defaults to -1.
+
+        Returns:
+            str: The decoded line.
+        """
+        line = self.read_until(b"\n", max_length, keepends).decode(encoding)
 
-        data += terminator
+        return line if keepends else line.removesuffix("\r")
+
+    def _read_length(self, prefix: str) -> int:
+        fmt = _prefix_format(prefix)
+
+        if fmt is None:
+            return self.read_uleb128()
+
+        return self._unpack(self._structs[fmt])[0]
+
+    def read_bytes_prefixed(self, prefix: str = "uleb128") -> bytes:
+        """
+        Reads a blob preceded by its length.
+
+        Args:
+            prefix (str, optional): The type of the length prefix: "uleb128",
+                "uint8", "uint16" or "uint32". Defaults to "uleb128".
+
+        Returns:
+            bytes: The blob read.
+        """
+        size = self._read_length(prefix)
+        data = self.read(size)
+
+        if len(data) != size:
+            raise struct.error(f"unpack requires a buffer of {size} bytes")
 
         return data
 
+    def read_string(
+        self,
+        encoding: str = "utf-8",
+        prefix: str = "uleb128",
+        intern: dict[str, str] | None = None,
+    ) -> str:
+        """
+        Reads a string preceded by its length in bytes.
+
+        Args:
+            encoding (str, optional): The encoding of the string. Defaults to
+                "utf-8".
+            prefix (str, optional): The type of the length prefix: "uleb128",
+                "uint8", "uint16" or "uint32". Defaults to "uleb128".
+            intern (dict[str, str], optional): A table of previously read strings.
+                Equal strings are returned as the instance already in the table,
+                and new ones are added to it. Defaults to None.
+
+        Returns:
+            str: The decoded string.
+        """
+        size = self._read_length(prefix)
+        data = self._read_view(size)
+
+        if len(data) != size:
+            raise struct.error(f"unpack requires a buffer of {size} bytes")
+
+        value = str(data, encoding)
+
+        if intern is not None:
+            value = intern.setdefault(value, value)
+
+        return value
+
+    def read_strings(
+        self,
+        count: int,
+        encoding: str = "utf-8",
+        prefix: str = "uleb128",
+        intern: dict[str, str] | None = None,
+    ) -> list[str]:
+        """
+        Reads `count` length-prefixed strings. The strings are decoded straight
+        from the backing buffer, without creating an intermediate bytes object for
+        each of them.
+
+        Args:
+            count (int): The number of strings to read.
+            encoding (str, optional): The encoding of the strings. Defaults to
+                "utf-8".
+            prefix (str, optional): The type of the length prefixes: "uleb128",
+                "uint8", "uint16" or "uint32". Defaults to "uleb128".
+            intern (dict[str, str], optional): A table of previously read strings,
+                as for `read_string`. Defaults to None.
+
+        Returns:
+            list[str]: The decoded strings.
+        """
+        fmt = _prefix_format(prefix)
+
+        if isinstance(self._backing_stream, SourceIO):
+            # the window is refilled as the stream advances
+            return [self.read_string(encoding, prefix, intern) for _ in range(count)]
+
+        compiled = None if fmt is None else self._structs[fmt]
+        strings = []
+        pos = self.tell()
+
+        with memoryview(self._getbuffer()) as view:
+            end = len(view)
+
+            for _ in range(count):
+                if compiled is None:
+                    lengths, pos = _decode_leb128(view, pos, end, 1, False)
+
+                    if not lengths:
+                        raise struct.error("truncated uleb128 length prefix")
+
+                    size = lengths[0]
+                else:
+                    size = compiled.unpack_from(view, pos)[0]
+                    pos += compiled.size
+
+                if pos + size > end:
+                    raise struct.error(f"unpack requires a buffer of {size} bytes")
+
+                value = str(view[pos:pos + size], encoding)
+
+                if intern is not None:
+                    value = intern.setdefault(value, value)
+
+                strings.append(value)
+                pos += size
+
+        self.seek(pos)
+
+        return strings
+
     def read_int64(self) -> int:
-        return self.read_format("q")
+        return self._unpack(self._scalars["q"])[0]
 
     def read_uint64(self) -> int:
-        return self.read_format("Q")
+        return self._unpack(self._scalars["Q"])[0]
 
     def read_int32(self) -> int:
-        return self.read_format("i")
+        return self._unpack(self._scalars["i"])[0]
 
     def read_uint32(self) -> int:
-        return self.read_format("I")
+        return self._unpack(self._scalars["I"])[0]
 
     def read_int16(self) -> int:
-        return self.read_format("h")
+        return self._unpack(self._scalars["h"])[0]
 
     def read_uint16(self) -> int:
-        return self.read_format("H")
+        return self._unpack(self._scalars["H"])[0]
 
     def read_int8(self) -> int:
-        return self.read_format("b")
+        return self._unpack(self._scalars["b"])[0]
 
     def read_uint8(self) -> int:
-        return self.read_format("B")
+        return self._unpack(self._scalars["B"])[0]
 
     def read_float(self) -> float:
-        return self.read_format("f")
+        return self._unpack(self._scalars["f"])[0]
 
     def read_double(self) -> float:
-        return self.read_format("d")
+        return self._unpack(self._scalars["d"])[0]
 
     def read_bool(self) -> bool:
         return bool(self.read_uint8())
 
+    def read_int64_at(self, offset: int) -> int:
+        return self.read_format_at("q", offset)
+
+    def read_uint64_at(self, offset: int) -> int:
+        return self.read_format_at("Q", offset)
+
+    def read_int32_at(self, offset: int) -> int:
+        return self.read_format_at("i", offset)
+
+    def read_uint32_at(self, offset: int) -> int:
+        return self.read_format_at("I", offset)
+
+    def read_int16_at(self, offset: int) -> int:
+        return self.read_format_at("h", offset)
+
+    def read_uint16_at(self, offset: int) -> int:
+        return self.read_format_at("H", offset)
+
+    def read_int8_at(self, offset: int) -> int:
+        return self.read_format_at("b", offset)
+
+    def read_uint8_at(self, offset: int) -> int:
+        return self.read_format_at("B", offset)
+
+    def read_float_at(self, offset: int) -> float:
+        return self.read_format_at("f", offset)
+
+    def read_double_at(self, offset: int) -> float:
+        return self.read_format_at("d", offset)
+
+    def read_bool_at(self, offset: int) -> bool:
+        return bool(self.read_uint8_at(offset))
+
+    def read_int64_array(self, count: int, numpy: bool = False) -> array.array:
+        return self.read_array("int64", count, numpy)
+
+    def read_uint64_array(self, count: int, numpy: bool = False) -> array.array:
+        return self.read_array("uint64", count, numpy)
+
+    def read_int32_array(self, count: int, numpy: bool = False) -> array.array:
+        return self.read_array("int32", count, numpy)
+
+    def read_uint32_array(self, count: int, numpy: bool = False) -> array.array:
+        return self.read_array("uint32", count, numpy)
+
+    def read_int16_array(self, count: int, numpy: bool = False) -> array.array:
+        return self.read_array("int16", count, numpy)
+
+    def read_uint16_array(self, count: int, numpy: bool = False) -> array.array:
+        return self.read_array("uint16", count, numpy)
+
+    def read_int8_array(self, count: int, numpy: bool = False) -> array.array:
+        return self.read_array("int8", count, numpy)
+
+    def read_uint8_array(self, count: int, numpy: bool = False) -> array.array:
+        return self.read_array("uint8", count, numpy)
+
+    def read_float_array(self, count: int, numpy: bool = False) -> array.array:
+        return self.read_array("float", count, numpy)
+
+    def read_double_array(self, count: int, numpy: bool = False) -> array.array:
+        return self.read_array("double", count, numpy)
+
     def read_uleb128(self) -> int:
         """
         Reads an unsigned LEB128 (Little-Endian Base 128) encoded integer from the data
@@ -106,18 +745,134 @@ class DeserializingStream(BaseStream):
 
         decoded = self.read_uint8()
 
-        if decoded < 0x7F:
+        if decoded < 0x80:
             return decoded
 
         decoded &= 0x7F
         shift_mod = 1
 
-        while max_bytes != 0 and (current_byte := self.read_uint8()) & 0x80:
+        # a value cut off by the limit ends with the bytes read so far, like in
+        # the async readers
+        while max_bytes != 0:
+            current_byte = self.read_uint8()
             decoded += (current_byte & 0x7F) << shift_mod * 7
+
+            if current_byte < 0x80:
+                break
+
             shift_mod += 1
             max_bytes -= 1
 
-        return decoded + (current_byte << shift_mod * 7) # type: ignore
+        return decoded
+
+    def read_uleb128_many(
+        self, count: int = -1, max_bytes: int = -1, typecode: str | None = None
+    ) -> tuple[list[int] | array.array, int]:
+        """
+        Reads consecutive unsigned LEB128 encoded integers in a single pass over the
+        buffer. Reading stops after `count` values, before the first value that
+        does not end within `max_bytes` bytes, or at the end of the stream. The
+        stream is left positioned after the last value read, so a truncated value
+        can be read again once more data is available.
+
+        Args:
+            count (int, optional): The maximum number of values to read. Defaults
+                to -1, which reads as many as possible.
+            max_bytes (int, optional): The maximum number of bytes to read.
+                Defaults to -1, which reads up to the end of the stream.
+            typecode (str, optional): If given, the values are returned in an
+                `array.array` of this typecode instead of a list.
+
+        Returns:
+            tuple[list[int] | array.array, int]: The decoded values and the number
+                of bytes consumed.
+        """
+        return self._read_leb128_many(count, max_bytes, typecode, False)
+
+    def read_sleb128_many(
+        self, count: int = -1, max_bytes: int = -1, typecode: str | None = None
+    ) -> tuple[list[int] | array.array, int]:
+        """
+        Reads consecutive signed LEB128 encoded integers in a single pass over the
+        buffer. See `read_uleb128_many` for how reading stops.
+
+        Args:
+            count (int, optional): The maximum number of values to read. Defaults
+                to -1, which reads as many as possible.
+            max_bytes (int, optional): The maximum number of bytes to read.
+                Defaults to -1, which reads up to the end of the stream.
+            typecode (str, optional): If given, the values are returned in an
+                `array.array` of this typecode instead of a list.
+
+        Returns:
+            tuple[list[int] | array.array, int]: The decoded values and the number
+                of bytes consumed.
+        """
+        return self._read_leb128_many(count, max_bytes, typecode, True)
+
+    def _read_leb128_many(
+        self, count: int, max_bytes: int, typecode: str | None, signed: bool
+    ) -> tuple[list[int] | array.array, int]:
+        if isinstance(self._backing_stream, SourceIO):
+            values, size = self._read_leb128_window(count, max_bytes, signed)
+
+            if typecode is not None:
+                values = array.array(typecode, values)
+
+            return values, size
+
+        buffer = self._getbuffer()
+        pos = self.tell()
+        end = len(buffer) if max_bytes < 0 else min(pos + max_bytes, len(buffer))
+        result = None
+
+        if end - pos >= _NUMPY_LEB128_THRESHOLD and (np := sys.modules.get("numpy")):
+            result = _decode_leb128_numpy(np, buffer, pos, end, count, signed)
+
+        if result is None:
+            result = _decode_leb128(buffer, pos, end, count, signed)
+
+        values, end = result
+
+        self.seek(end)
+
+        if typecode is not None:
+            values = array.array(typecode, values)
+
+        return values, end - pos
+
+    def _read_leb128_window(
+        self, count: int, max_bytes: int, signed: bool
+    ) -> tuple[list[int], int]:
+        # a streamed source cannot be viewed as a whole, so decode it one window
+        # at a time. a value cut off by the end of a window is decoded again from
+        # the start of the next one.
+        source = typing.cast(SourceIO, self._backing_stream)
+        start = pos = self.tell()
+        values = []
+
+        while count != 0:
+            size = len(source._window)
+
+            if max_bytes >= 0:
+                size = min(size, start + max_bytes - pos)
+
+            chunk = source.peek_at(pos, size)
+            decoded, end = _decode_leb128(chunk, 0, len(chunk), count, signed)
+
+            values += decoded
+            pos += end
+            self.seek(pos)
+
+            if count > 0:
+                count -= len(decoded)
+
+            # the source or `max_bytes` ran out, or a single value is larger
+            # than the window
+            if len(chunk) < size or end == 0:
+                break
+
+        return values, pos - start
 
     def read_sleb128(self) -> int:
         """
@@ -149,19 +904,24 @@ class DeserializingStream(BaseStream):
         decoded = self.read_uint8()
         shift_mod = 1
 
-        if decoded < 0x7F:
-            return decoded
+        if decoded < 0x80:
+            return decoded - 0x80 if decoded & 0x40 else decoded
 
         decoded &= 0x7F
 
-        while stop_after != 0 and (current_byte := self.read_uint8()) & 0x80:
+        # a value cut off by the limit ends with the bytes read so far, like in
+        # the async readers
+        while stop_after != 0:
+            current_byte = self.read_uint8()
             decoded += (current_byte & 0x7F) << shift_mod * 7
             shift_mod += 1
-            stop_after -= 1
 
-        decoded += (current_byte << shift_mod * 7) # type: ignore
+            if current_byte < 0x80:
+                break
+
+            stop_after -= 1
 
         if current_byte & 0x40: # type: ignore
-            decoded |= -(1 << (shift_mod * 7) + 7)
+            decoded |= -(1 << shift_mod * 7)
 
         return decoded
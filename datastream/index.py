@@ -0,0 +1,164 @@
+import array
+import collections.abc
+import hashlib
+import os
+import struct
+import sys
+import typing
+import zlib
+
+from datastream.base import _struct_caches
+from datastream.buffer import BufferIO
+from datastream.record import Record
+
+if typing.TYPE_CHECKING:
+    from datastream.deserializing import DeserializingStream
+
+
+# magic, size of the indexed stream, digest of its fingerprint and of the
+# parameters the index was built with, number of offsets. the offsets follow as
+# little-endian uint64 values.
+_INDEX_MAGIC = b"DSR3"
+_index_header = _struct_caches["<"]["4sQ32sQ"]
+
+
+def _fingerprint(stream: "DeserializingStream") -> tuple[int, ...]:
+    # stand-in for the contents of the stream: the identity and modification
+    # time of the file it is mapped read-only from, or the CRC32 of all of it.
+    # writes through a writable mapping do not reliably update the modification
+    # time, so those streams are hashed too.
+    backing = stream._backing_stream
+
+    if (
+        isinstance(backing, BufferIO)
+        and backing._path is not None
+        and backing._view.readonly
+    ):
+        try:
+            stat = os.stat(backing._path)
+        except OSError:
+            pass
+        else:
+            return stat.st_ino, stat.st_mtime_ns
+
+    return (zlib.crc32(stream._getbuffer()),)
+
+
+def _index_key(
+    stream: "DeserializingStream", record: Record | str, start: int, count: int
+) -> tuple[int, bytes]:
+    # what an index file has to match to be reused: the size and fingerprint of
+    # the stream, and the layout, byte order, start and count of the records
+    size = stream.size()
+    layout = record.fields if isinstance(record, Record) else record
+    params = (layout, stream._byteorder, start, count, _fingerprint(stream))
+
+    return size, hashlib.sha256(repr(params).encode()).digest()
+
+
+class RecordIndex(collections.abc.Sequence):
+    """
+    A lazy sequence of the records of a stream, backed by an index of their
+    offsets. Records are only decoded when they are accessed, and accessing one
+    leaves the stream position unchanged.
+
+    Instances are created by `DeserializingStream.index_records`.
+
+    Args:
+        stream (DeserializingStream): The stream holding the records.
+        record (Record | str): The layout of the records, or the type of the
+            length prefix of length-prefixed blobs ("uleb128", "uint8", "uint16" or
+            "uint32").
+        offsets (array.array): The offset of each record, as an array of typecode
+            "Q".
+        start (int | None, optional): The offset indexing started at. Defaults to
+            the first offset.
+        count (int | None, optional): The number of records requested, -1 if the
+            index runs to the end of the stream. Defaults to the number of offsets.
+    """
+
+    def __init__(
+        self,
+        stream: "DeserializingStream",
+        record: Record | str,
+        offsets: array.array,
+        start: int | None = None,
+        count: int | None = None,
+    ):
+        self.stream = stream
+        self.record = record
+        self.offsets = offsets
+        self._start = start if start is not None else offsets[0] if offsets else 0
+        self._count = count if count is not None else len(offsets)
+
+    def __repr__(self) -> str:
+        return f"<RecordIndex of {len(self.offsets)} {self.record!r} records>"
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __getitem__(self, index: int | slice) -> typing.Any:
+        if isinstance(index, slice):
+            return RecordIndex(self.stream, self.record, self.offsets[index])
+
+        offset = self.offsets[index]
+        pos = self.stream.tell()
+
+        try:
+            self.stream.seek(offset)
+
+            if isinstance(self.record, Record):
+                return self.record.read(self.stream)
+
+            return self.stream.read_bytes_prefixed(self.record)
+        finally:
+            self.stream._reposition(pos)
+
+    def save(self, path: str | os.PathLike):
+        """
+        Saves the offsets to `path`, so that they can be reused by
+        `DeserializingStream.index_records` instead of scanning the stream again.
+
+        Args:
+            path (str | os.PathLike): The path of the index file.
+        """
+        offsets = self.offsets
+
+        if sys.byteorder != "little":
+            offsets = array.array("Q", offsets)
+            offsets.byteswap()
+
+        key = _index_key(self.stream, self.record, self._start, self._count)
+
+        with open(path, "wb") as file:
+            file.write(_index_header.pack(_INDEX_MAGIC, *key, len(offsets)))
+            offsets.tofile(file)
+
+
+def _load_offsets(
+    path: str | os.PathLike,
+    stream: "DeserializingStream",
+    record: Record | str,
+    start: int,
+    count: int,
+) -> array.array | None:
+    # returns the offsets saved in `path`, or None if the file is missing or was
+    # saved for other contents or parameters
+    try:
+        with open(path, "rb") as file:
+            magic, *key, saved = _index_header.unpack(file.read(_index_header.size))
+
+            if magic != _INDEX_MAGIC or tuple(key) != _index_key(
+                stream, record, start, count
+            ):
+                return None
+
+            offsets = array.array("Q")
+            offsets.fromfile(file, saved)
+    except (OSError, EOFError, ValueError, struct.error):
+        return None
+
+    if sys.byteorder != "little":
+        offsets.byteswap()
+
+    return offsets
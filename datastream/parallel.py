@@ -0,0 +1,117 @@
+import concurrent.futures
+import functools
+import mmap
+import os
+import typing
+from multiprocessing import shared_memory
+
+from datastream.base import BaseStream
+from datastream.buffer import BufferIO
+from datastream.deserializing import DeserializingStream
+from datastream.index import RecordIndex
+
+# the buffer shared with the parent, attached once per worker process
+_worker_buffer: typing.Any = None
+
+
+def _open_shared_memory(name: str) -> shared_memory.SharedMemory:
+    try:
+        # the parent owns the block and unlinks it, so workers must not track it
+        return shared_memory.SharedMemory(name, track=False) # type: ignore
+    except TypeError:
+        # track was added in Python 3.13
+        return shared_memory.SharedMemory(name)
+
+
+def _attach(kind: str, name: str):
+    global _worker_buffer
+
+    if kind == "file":
+        with open(name, "rb") as file:
+            _worker_buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    else:
+        _worker_buffer = _open_shared_memory(name)
+
+
+def _decode_range(
+    decoder_fn: typing.Callable[[DeserializingStream], typing.Any],
+    byteorder: int,
+    start: int,
+    end: int,
+) -> typing.Any:
+    buffer = _worker_buffer
+
+    if isinstance(buffer, shared_memory.SharedMemory):
+        buffer = buffer.buf
+
+    stream = DeserializingStream.from_buffer(memoryview(buffer)[start:end], byteorder)
+
+    try:
+        return decoder_fn(stream)
+    finally:
+        stream.close()
+
+
+def parallel_map(
+    stream: BaseStream,
+    offsets: typing.Iterable[int] | RecordIndex,
+    decoder_fn: typing.Callable[[DeserializingStream], typing.Any],
+    workers: int | None = None,
+) -> list[typing.Any]:
+    """
+    Decodes independent chunks of `stream` in a pool of worker processes. Chunk
+    `i` spans from `offsets[i]` to `offsets[i + 1]`, and the last one extends to
+    the end of the stream. Each worker calls `decoder_fn` with a
+    DeserializingStream over one chunk, in the byte order of `stream`.
+
+    The workers read the data without copying it: streams created with
+    `from_file` are mapped again by each worker, and other streams are copied
+    once into a shared memory block.
+
+    Args:
+        stream (BaseStream): The stream holding the chunks.
+        offsets (typing.Iterable[int] | RecordIndex): The ascending start offsets
+            of the chunks, or a RecordIndex whose records are the chunks.
+        decoder_fn (typing.Callable[[DeserializingStream], typing.Any]): The
+            function decoding a chunk. Must be picklable, e.g. defined at module
+            level, and so must its results.
+        workers (int, optional): The number of worker processes. Defaults to the
+            number of CPUs.
+
+    Returns:
+        list[typing.Any]: The result of `decoder_fn` for each chunk, in order.
+    """
+    if isinstance(offsets, RecordIndex):
+        offsets = offsets.offsets
+
+    starts = list(offsets)
+
+    if not starts:
+        return []
+
+    size = stream.size()
+    ends = [*starts[1:], size]
+    workers = workers or os.cpu_count() or 1
+    decode = functools.partial(_decode_range, decoder_fn, stream.byteorder)
+    backing = stream._backing_stream
+    block = None
+
+    if isinstance(backing, BufferIO) and backing._path is not None:
+        source = ("file", backing._path)
+    else:
+        block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        block.buf[:size] = stream._getbuffer()
+        source = ("shm", block.name)
+
+    try:
+        with concurrent.futures.ProcessPoolExecutor(
+            workers, initializer=_attach, initargs=source
+        ) as executor:
+            # batch the chunks to keep the number of round trips low
+            chunksize = max(1, len(starts) // (workers * 4))
+
+            return list(executor.map(decode, starts, ends, chunksize=chunksize))
+    finally:
+        if block is not None:
+            block.close()
+            block.unlink()
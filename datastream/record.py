@@ -0,0 +1,157 @@
+import collections
+import typing
+
+from datastream.base import _signed_bits, _struct_caches, _type_formats
+
+if typing.TYPE_CHECKING:
+    from datastream.deserializing import DeserializingStream
+    from datastream.serializing import SerializingStream
+
+
+# variable-width field types, read and written through the stream methods
+_varint_types = ("uleb128", "sleb128")
+
+
+def _wrap_signed(
+    value: typing.Sequence[typing.Any], signed: list[tuple[int, int]]
+) -> list[typing.Any]:
+    # signed fields past their maximum wrap around, as they do in the typed
+    # writers. `signed` holds the index and width of each signed field.
+    value = list(value)
+
+    for index, bits in signed:
+        if value[index] > (1 << bits - 1) - 1:
+            value[index] -= 1 << bits
+
+    return value
+
+
+class Record:
+    """
+    A named layout of fields that is read and written as a unit. Each run of
+    consecutive fixed-width fields is compiled into a single struct format, so
+    reading a record costs one unpack per run rather than one per field.
+
+    Args:
+        name (str): The name of the record type.
+        fields (typing.Iterable[tuple[str, str]]): The (name, type) pairs of the
+            fields, in stream order. The type is one of the typed method names:
+            "int8" through "uint64", "float", "double", "bool", "uleb128" or
+            "sleb128".
+    """
+
+    def __init__(self, name: str, fields: typing.Iterable[tuple[str, str]]):
+        self.name = name
+        self.fields = tuple(fields)
+        self.type = collections.namedtuple(name, [field for field, _ in self.fields])
+
+        # each step is either a struct format covering a run of fixed fields, or
+        # a variable-width type name
+        self._steps: list[tuple[str, int]] = []
+        # the index and width of the signed fixed-width fields
+        self._signed: list[tuple[int, int]] = []
+        fmt = ""
+
+        for index, (field, kind) in enumerate(self.fields):
+            if kind in _varint_types:
+                if fmt:
+                    self._steps.append((fmt, len(fmt)))
+                    fmt = ""
+
+                self._steps.append((kind, 1))
+            elif kind in _type_formats:
+                fmt += _type_formats[kind]
+
+                if fmt[-1] in _signed_bits:
+                    self._signed.append((index, _signed_bits[fmt[-1]]))
+            else:
+                raise ValueError(f"unsupported type for field {field!r}: {kind!r}")
+
+        if fmt:
+            self._steps.append((fmt, len(fmt)))
+
+        # fixed-size records are a single step
+        self._format = fmt if len(self._steps) == 1 and fmt else None
+
+    def __repr__(self) -> str:
+        return f"Record({self.name!r}, {list(self.fields)!r})"
+
+    def __call__(self, *args, **kwargs) -> tuple:
+        """
+        Creates a record value from the given field values.
+        """
+        return self.type(*args, **kwargs)
+
+    @property
+    def format(self) -> str | None:
+        """
+        Returns the struct format of the record, or None if it contains
+        variable-width fields.
+        """
+        return self._format
+
+    @property
+    def size(self) -> int | None:
+        """
+        Returns the size of the record in bytes, or None if it contains
+        variable-width fields.
+        """
+        if self._format is None:
+            return None
+
+        # packed formats have the same size in every byte order
+        return _struct_caches["<"][self._format].size
+
+    def read(self, stream: "DeserializingStream") -> tuple:
+        """
+        Reads a record from `stream`.
+
+        Args:
+            stream (DeserializingStream): The stream to read from.
+
+        Returns:
+            tuple: The record, as an instance of `self.type`.
+        """
+        structs = stream._structs.packed
+
+        if self._format is not None:
+            return self.type._make(stream._unpack(structs[self._format]))
+
+        values = []
+
+        for step, _ in self._steps:
+            if step in _varint_types:
+                values.append(getattr(stream, f"read_{step}")())
+            else:
+                values.extend(stream._unpack(structs[step]))
+
+        return self.type._make(values)
+
+    def write(self, stream: "SerializingStream", value: typing.Sequence[typing.Any]):
+        """
+        Writes a record to `stream`.
+
+        Args:
+            stream (SerializingStream): The stream to write to.
+            value (typing.Sequence[typing.Any]): The field values, in field order.
+        """
+        structs = stream._structs.packed
+
+        if self._signed:
+            value = _wrap_signed(value, self._signed)
+
+        if self._format is not None:
+            stream._pack(structs[self._format], *value)
+
+            return
+
+        index = 0
+
+        for step, count in self._steps:
+            if step in _varint_types:
+                getattr(stream, f"write_{step}")(value[index])
+            else:
+                stream._pack(structs[step], *value[index:index + count])
+
+            index += count
+
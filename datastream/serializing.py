@@ -1,18 +1,127 @@
+import array
 import io
-import struct
+import os
+import sys
 import typing
 
-from datastream.base import BaseStream, ByteOrder
+from datastream.base import (
+    BaseStream,
+    ByteOrder,
+    _array_typecode,
+    _prefix_format,
+    _type_formats,
+)
+from datastream.buffer import BufferIO, GatherIO
+from datastream.record import Record
+
+try:
+    _IOV_MAX = os.sysconf("SC_IOV_MAX")
+except (AttributeError, ValueError, OSError):
+    _IOV_MAX = -1
+
+if _IOV_MAX <= 0:
+    _IOV_MAX = 1024
+
+
+def _write_vectored(writev: typing.Callable, segments: list[typing.Any]) -> int:
+    # writes `segments` with as few `writev` calls as possible, resuming after
+    # partial writes. returns the number of bytes written.
+    views = [memoryview(segment).cast("B") for segment in segments if len(segment)]
+    total = 0
+    index = 0
+
+    while index < len(views):
+        written = writev(views[index:index + _IOV_MAX])
+        total += written
+
+        # skip the segments that were written completely
+        while index < len(views) and written >= len(views[index]):
+            written -= len(views[index])
+            index += 1
+
+        if written:
+            views[index] = views[index][written:]
+
+    return total
+
+
+def _write_all(target: typing.Any, data: typing.Any) -> int:
+    # writes all of `data` to a socket, file descriptor or file-like object
+    view = memoryview(data).cast("B")
+
+    if hasattr(target, "sendall"):
+        target.sendall(view)
+    elif isinstance(target, int):
+        written = 0
+
+        while written < len(view):
+            written += os.write(target, view[written:])
+    else:
+        written = target.write(view)
+
+        # raw files may write less than requested
+        while written is not None and written < len(view):
+            written += target.write(view[written:])
+
+    return len(view)
+
+
+def _encode_uleb128(value: int, max_bytes: int, out: bytearray):
+    # appends the encoding of `value` to `out`, using at most `max_bytes` bytes
+    # (unbounded if negative)
+    while max_bytes != 0:
+        byte = value & 0x7F
+        value >>= 7
+
+        if value == 0:
+            out.append(byte)
+
+            break
+
+        out.append(byte | 0x80)
+        max_bytes -= 1
+
+
+def _encode_sleb128(value: int, max_bytes: int, out: bytearray):
+    # appends the encoding of `value` to `out`, using at most `max_bytes` + 1 bytes
+    # (unbounded if negative)
+    if value >= 0:
+        while max_bytes != 0 and value > 0x3F:
+            out.append((value & 0x7F) | 0x80)
+
+            value >>= 7
+            max_bytes -= 1
+    else:
+        while max_bytes != 0 and value < -0x40:
+            out.append((value & 0x7F) | 0x80)
+
+            value >>= 7
+            max_bytes -= 1
+
+    out.append(value & 0x7F)
 
 
 class SerializingStream(BaseStream):
+    _appends = True
+
     def __init__(
         self,
-        buffer: typing.IO[bytes] | None = None,
+        buffer: typing.IO[bytes] | BufferIO | None = None,
         byteorder: int = ByteOrder.NATIVE_ENDIAN,
+        capacity: int | None = None,
+        gather: bool = False,
     ):
         if buffer is None:
-            buffer = io.BytesIO()
+            if gather:
+                # large writes are referenced instead of copied, and flushed
+                # together with the packed values by flush_to
+                buffer = GatherIO()
+            elif capacity is not None:
+                # with a capacity hint, values are packed straight into a growable
+                # bytearray instead of going through BytesIO
+                buffer = BufferIO.with_capacity(capacity)
+            else:
+                buffer = io.BytesIO()
 
         super().__init__(buffer, byteorder)
 
@@ -28,55 +137,257 @@ class SerializingStream(BaseStream):
     def __bytes__(self) -> bytes: # type: ignore
         return self.bytes()
 
+    def getbuffer(self) -> memoryview:
+        """
+        Returns a view over the bytes written to the stream without copying them.
+        For BytesIO-backed streams, the stream cannot be resized while the view is
+        alive. Gathering streams are not contiguous and are joined into a copy.
+
+        Returns:
+            memoryview: A view over the bytes written to the stream.
+        """
+        return self._backing_stream.getbuffer()
+
+    def flush_to(self, target: typing.Any) -> int:
+        """
+        Writes the bytes written to the stream to `target` without copying them
+        first. The stream itself is left unchanged. Gathering streams write all of
+        their segments with `socket.sendmsg` or `os.writev`.
+
+        Args:
+            target (typing.Any): A socket, a file descriptor or a binary file-like
+                object.
+
+        Returns:
+            int: The number of bytes written.
+        """
+        if isinstance(self._backing_stream, GatherIO):
+            segments = self._backing_stream.segments()
+
+            if hasattr(target, "sendmsg"):
+                return _write_vectored(target.sendmsg, segments)
+
+            if isinstance(target, int) and hasattr(os, "writev"):
+                return _write_vectored(lambda views: os.writev(target, views), segments)
+
+            return sum(_write_all(target, segment) for segment in segments)
+
+        with self.getbuffer() as view:
+            return _write_all(target, view)
+
     def write_format(self, fmt: str, value: typing.Any):
-        self.write(struct.pack(self._byteorder + fmt, value))
+        self._pack_value(self._structs[fmt], value)
+
+    def write_array(self, fmt: str, values: typing.Iterable[typing.Any]):
+        """
+        Writes a sequence of values of the same type with a single write to the
+        backing stream.
+
+        Args:
+            fmt (str): The type of the values, either a struct format character
+                ("I") or a type name ("uint32").
+            values (typing.Iterable[typing.Any]): The values to write. Lists,
+                `array.array` and NumPy arrays are accepted.
+        """
+        fmt = _type_formats.get(fmt, fmt)
+        typecode = _array_typecode(fmt, self._structs[fmt].size)
+        np = sys.modules.get("numpy")
+
+        if np is not None and isinstance(values, np.ndarray):
+            dtype = np.dtype(typecode).newbyteorder(self._structs.numpy_byteorder)
+
+            if dtype.kind in "iu" and values.size:
+                # numpy would wrap or truncate these silently; fail like the
+                # array.array path does
+                if values.dtype.kind not in "biu":
+                    raise TypeError(f"cannot write {values.dtype} values as {fmt!r}")
+
+                info = np.iinfo(dtype)
+
+                if int(values.min()) < info.min or int(values.max()) > info.max:
+                    raise OverflowError(f"values out of range for {fmt!r}")
+
+            self.write(np.ascontiguousarray(values, dtype))
+
+            return
+
+        # arrays of the right type are written as-is unless they need swapping
+        if (
+            not isinstance(values, array.array)
+            or values.typecode != typecode
+            or self._structs.byteswap
+        ):
+            values = array.array(typecode, values)
+
+        if self._structs.byteswap:
+            values.byteswap()
+
+        self.write(values)
+
+    def write_record(self, record: Record, value: typing.Sequence[typing.Any]):
+        """
+        Writes a record laid out as described by `record`.
+
+        Args:
+            record (Record): The layout of the record.
+            value (typing.Sequence[typing.Any]): The field values, in field order.
+        """
+        record.write(self, value)
+
+    def _prefixed(self, size: int, prefix: str) -> bytearray:
+        # returns a buffer holding the length prefix for `size` bytes
+        fmt = _prefix_format(prefix)
+        encoded = bytearray()
+
+        if fmt is None:
+            _encode_uleb128(size, -1, encoded)
+        else:
+            encoded += self._structs[fmt].pack(size)
+
+        return encoded
+
+    def write_bytes_prefixed(self, data: typing.Any, prefix: str = "uleb128"):
+        """
+        Writes a blob preceded by its length.
+
+        Args:
+            data (typing.Any): The bytes-like object to write.
+            prefix (str, optional): The type of the length prefix: "uleb128",
+                "uint8", "uint16" or "uint32". Defaults to "uleb128".
+        """
+        size = memoryview(data).nbytes
+
+        self.write(self._prefixed(size, prefix))
+        self.write(data)
+
+    def write_string(
+        self, value: str, encoding: str = "utf-8", prefix: str = "uleb128"
+    ):
+        """
+        Writes a string preceded by its length in bytes.
+
+        Args:
+            value (str): The string to write.
+            encoding (str, optional): The encoding of the string. Defaults to
+                "utf-8".
+            prefix (str, optional): The type of the length prefix: "uleb128",
+                "uint8", "uint16" or "uint32". Defaults to "uleb128".
+        """
+        data = value.encode(encoding)
+        encoded = self._prefixed(len(data), prefix)
+
+        encoded += data
+        self.write(encoded)
+
+    def write_strings(
+        self,
+        values: typing.Iterable[str],
+        encoding: str = "utf-8",
+        prefix: str = "uleb128",
+    ):
+        """
+        Writes a sequence of length-prefixed strings. The strings are encoded into
+        one buffer, which is written with a single call.
+
+        Args:
+            values (typing.Iterable[str]): The strings to write.
+            encoding (str, optional): The encoding of the strings. Defaults to
+                "utf-8".
+            prefix (str, optional): The type of the length prefixes: "uleb128",
+                "uint8", "uint16" or "uint32". Defaults to "uleb128".
+        """
+        fmt = _prefix_format(prefix)
+        compiled = None if fmt is None else self._structs[fmt]
+        encoded = bytearray()
+
+        for value in values:
+            data = value.encode(encoding)
+
+            if compiled is None:
+                _encode_uleb128(len(data), -1, encoded)
+            else:
+                encoded += compiled.pack(len(data))
+
+            encoded += data
+
+        self.write(encoded)
 
     def write_int64(self, value: int):
         # convert to signed if necessary
         if value > 0x7FFFFFFFFFFFFFFF:
             value = -0x10000000000000000 + value
 
-        self.write_format("q", value)
+        self._pack_value(self._scalars["q"], value)
 
     def write_uint64(self, value: int):
-        self.write_format("Q", value)
+        self._pack_value(self._scalars["Q"], value)
 
     def write_int32(self, value: int):
         if value > 0x7FFFFFFF:
             value = -0x100000000 + value
 
-        self.write_format("i", value)
+        self._pack_value(self._scalars["i"], value)
 
     def write_uint32(self, value: int):
-        self.write_format("I", value)
+        self._pack_value(self._scalars["I"], value)
 
     def write_int16(self, value: int):
         if value > 0x7FFF:
             value = -0x10000 + value
 
-        self.write_format("h", value)
+        self._pack_value(self._scalars["h"], value)
 
     def write_uint16(self, value: int):
-        self.write_format("H", value)
+        self._pack_value(self._scalars["H"], value)
 
     def write_int8(self, value: int):
         if value > 0x7F:
             value = -0x100 + value
 
-        self.write_format("b", value)
+        self._pack_value(self._scalars["b"], value)
 
     def write_uint8(self, value: int):
-        self.write_format("B", value)
+        self._pack_value(self._scalars["B"], value)
 
     def write_float(self, value: float):
-        self.write_format("f", value)
+        self._pack_value(self._scalars["f"], value)
 
     def write_double(self, value: float):
-        self.write_format("d", value)
+        self._pack_value(self._scalars["d"], value)
 
     def write_bool(self, value: bool):
         self.write_uint8(int(value))
 
+    def write_int64_array(self, values: typing.Iterable[int]):
+        self.write_array("int64", values)
+
+    def write_uint64_array(self, values: typing.Iterable[int]):
+        self.write_array("uint64", values)
+
+    def write_int32_array(self, values: typing.Iterable[int]):
+        self.write_array("int32", values)
+
+    def write_uint32_array(self, values: typing.Iterable[int]):
+        self.write_array("uint32", values)
+
+    def write_int16_array(self, values: typing.Iterable[int]):
+        self.write_array("int16", values)
+
+    def write_uint16_array(self, values: typing.Iterable[int]):
+        self.write_array("uint16", values)
+
+    def write_int8_array(self, values: typing.Iterable[int]):
+        self.write_array("int8", values)
+
+    def write_uint8_array(self, values: typing.Iterable[int]):
+        self.write_array("uint8", values)
+
+    def write_float_array(self, values: typing.Iterable[float]):
+        self.write_array("float", values)
+
+    def write_double_array(self, values: typing.Iterable[float]):
+        self.write_array("double", values)
+
     def write_uleb128(self, value: int):
         """
         Writes a ULEB128(Unsigned Little-Endian Base 128) number to the data stream.
@@ -97,17 +408,26 @@ class SerializingStream(BaseStream):
             max_bytes (int, optional): The maximum number of bytes to use for encoding
                 the value. Defaults to 16.
         """
-        while max_bytes != 0:
-            byte = value & 0x7F
-            value >>= 7
+        encoded = bytearray()
 
-            if value == 0:
-                self.write_uint8(byte)
+        _encode_uleb128(value, max_bytes, encoded)
+        self.write(encoded)
 
-                break
+    def write_uleb128_many(self, values: typing.Iterable[int]):
+        """
+        Writes a sequence of ULEB128(Unsigned Little-Endian Base 128) numbers to the
+        data stream. The values are encoded into one buffer, which is written with a
+        single call.
 
-            self.write_uint8(byte | 0x80)
-            max_bytes -= 1
+        Args:
+            values (typing.Iterable[int]): The unsigned integer values to be written.
+        """
+        encoded = bytearray()
+
+        for value in values:
+            _encode_uleb128(value, -1, encoded)
+
+        self.write(encoded)
 
     def write_sleb128(self, value: int):
         """
@@ -129,22 +449,23 @@ class SerializingStream(BaseStream):
             max_bytes (int, optional): The maximum number of bytes to use for encoding
                 the value. Defaults to 5.
         """
-        if value >= 0:
-            while max_bytes != 0 and value > 0x3F:
-                self.write_uint8((value & 0x7F) | 0x80)
+        encoded = bytearray()
 
-                # lsr >>> in java
-                value %= 0x100000000
-                value >>= 7
+        _encode_sleb128(value, max_bytes, encoded)
+        self.write(encoded)
 
-                max_bytes -= 1
+    def write_sleb128_many(self, values: typing.Iterable[int]):
+        """
+        Writes a sequence of SLEB128(Signed Little-Endian Base 128) numbers to the
+        data stream. The values are encoded into one buffer, which is written with a
+        single call.
 
-            self.write_uint8(value & 0x7F)
-        else:
-            while max_bytes != 0 and value < -0x40:
-                self.write_uint8((value & 0x7F) | 0x80)
+        Args:
+            values (typing.Iterable[int]): The signed integer values to be written.
+        """
+        encoded = bytearray()
 
-                value >>= 7
-                max_bytes -= 1
+        for value in values:
+            _encode_sleb128(value, -1, encoded)
 
-            self.write_uint8(value & 0x7F)
+        self.write(encoded)
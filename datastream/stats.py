@@ -0,0 +1,252 @@
+import collections
+import functools
+import struct
+import time
+import types
+import typing
+
+# called after every instrumented call with the stream, the method name, the
+# number of bytes the position advanced by (or, for reads that leave the position
+# alone, the number of bytes read), and the elapsed time in seconds (None unless
+# timing is enabled)
+StatsHook = typing.Callable[[typing.Any, str, int, float | None], None]
+
+# public methods that are not worth instrumenting, or that the instrumentation
+# itself relies on
+_uninstrumented = {
+    "tell",
+    "size",
+    "remaining",
+    "bytes",
+    "getbuffer",
+    "close",
+    "stats",
+    "enable_stats",
+    "disable_stats",
+}
+
+# instrumented classes, by the class they instrument
+_stats_classes: dict[type, type] = {}
+
+# returned by next() once an instrumented generator is exhausted
+_exhausted = object()
+
+
+def _category(name: str) -> str | None:
+    if name.startswith(("read", "iter_records", "index_records", "peek", "seekpeek")):
+        return "bytes_read"
+
+    if name.startswith("write"):
+        return "bytes_written"
+
+    if name == "seek":
+        return "seeks"
+
+    if name in ("search", "rsearch", "search_all"):
+        return "searches"
+
+    return None
+
+
+def _read_size(name: str) -> typing.Callable[..., int] | None:
+    # for reads that leave the position alone, returns a function computing the
+    # number of bytes read from the stream, the call's arguments and its result
+    if name in ("read_at", "peek", "seekpeek"):
+        return lambda stream, args, kwargs, result: len(result)
+
+    if name == "read_format_at":
+        return lambda stream, args, kwargs, result: stream._structs[
+            args[0] if args else kwargs["fmt"]
+        ].size
+
+    if name.startswith("read_") and name.endswith("_at"):
+        # base imports this module, so it cannot be imported at the top
+        from datastream.base import _type_formats
+
+        if name[5:-3] in _type_formats:
+            size = struct.calcsize("<" + _type_formats[name[5:-3]])
+
+            return lambda stream, args, kwargs, result: size
+
+    return None
+
+
+def _record(
+    stream: typing.Any,
+    name: str,
+    category: str | None,
+    advanced: int,
+    elapsed: float | None,
+):
+    stats = stream._stats
+    stats["calls"][name] += 1
+
+    if category in ("bytes_read", "bytes_written"):
+        stats[category] += advanced
+    elif category is not None:
+        stats[category] += 1
+
+    if elapsed is not None:
+        stats["time"][name] += elapsed
+
+    if stream._stats_hook is not None:
+        stream._stats_hook(stream, name, advanced, elapsed)
+
+
+def _instrument_generator(
+    stream: typing.Any,
+    name: str,
+    category: str | None,
+    moves: bool,
+    generator: typing.Generator,
+) -> typing.Iterator:
+    # generator methods (search_all, iter_records over variable-size records) do
+    # their work as they are iterated, so it is measured item by item and the
+    # call is recorded once the generator is exhausted or closed
+    advanced = 0
+    elapsed = None if not stream._stats_timing else 0.0
+
+    try:
+        while True:
+            # iterated from within another stream method, the work belongs to
+            # that call
+            nested = stream._stats_depth
+            stream._stats_depth = 1
+
+            try:
+                pos = stream.tell() if moves else 0
+                start = time.perf_counter() if elapsed is not None else None
+                item = next(generator, _exhausted)
+
+                if start is not None:
+                    elapsed += time.perf_counter() - start
+
+                if moves:
+                    advanced += stream.tell() - pos
+            finally:
+                stream._stats_depth = nested
+
+            if item is _exhausted:
+                break
+
+            yield item
+    finally:
+        generator.close()
+        _record(stream, name, category, advanced, elapsed)
+
+
+def _instrument(name: str, method: typing.Callable) -> typing.Callable:
+    category = _category(name)
+    read_size = _read_size(name)
+    measured = category in ("bytes_read", "bytes_written")
+    # other reads and writes are measured by how far they move the position
+    moves = measured and read_size is None
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        # calls made by other stream methods are part of the outer call
+        if self._stats_depth:
+            return method(self, *args, **kwargs)
+
+        self._stats_depth = 1
+
+        try:
+            pos = self.tell() if moves else 0
+            start = time.perf_counter() if self._stats_timing else None
+            result = method(self, *args, **kwargs)
+            elapsed = None if start is None else time.perf_counter() - start
+            advanced = self.tell() - pos if moves else 0
+        finally:
+            self._stats_depth = 0
+
+        if isinstance(result, types.GeneratorType):
+            return _instrument_generator(self, name, category, moves, result)
+
+        if read_size is not None:
+            advanced = read_size(self, args, kwargs, result)
+
+        _record(self, name, category, advanced, elapsed)
+
+        return result
+
+    return wrapper
+
+
+def _reset(stream: typing.Any, hook: StatsHook | None, timing: bool):
+    stream._stats = {
+        "calls": collections.Counter(),
+        "bytes_read": 0,
+        "bytes_written": 0,
+        "seeks": 0,
+        "searches": 0,
+        "time": collections.defaultdict(float),
+    }
+    stream._stats_hook = hook
+    stream._stats_timing = timing
+    stream._stats_depth = 0
+
+
+def _stats_class(cls: type) -> type:
+    # returns a subclass of `cls` whose public methods update the stream's
+    # counters. built once per class.
+    if cls in _stats_classes:
+        return _stats_classes[cls]
+
+    def __init__(self, *args, **kwargs):
+        # streams created by clone(), substream()... count separately
+        cls.__init__(self, *args, **kwargs)
+        _reset(self, None, False)
+
+    namespace = {"__init__": __init__, "__module__": cls.__module__}
+
+    for name in dir(cls):
+        method = getattr(cls, name)
+
+        if (
+            name.startswith("_")
+            or name in _uninstrumented
+            or not callable(method)
+            or isinstance(method, type)
+            or hasattr(method, "__self__")
+        ):
+            # private, excluded, non-method attributes and classmethods
+            continue
+
+        namespace[name] = _instrument(name, method)
+
+    stats_cls = _stats_classes[cls] = type(cls.__name__, (cls,), namespace)
+    stats_cls.__qualname__ = cls.__qualname__
+
+    return stats_cls
+
+
+def enable_stats(stream: typing.Any, hook: StatsHook | None, timing: bool):
+    _reset(stream, hook, timing)
+
+    stream.__class__ = _stats_class(_base_class(stream))
+
+
+def disable_stats(stream: typing.Any):
+    stream.__class__ = _base_class(stream)
+
+
+def _base_class(stream: typing.Any) -> type:
+    cls = type(stream)
+
+    return cls.__base__ if _stats_classes.get(cls.__base__) is cls else cls
+
+
+def snapshot(stream: typing.Any) -> dict[str, typing.Any]:
+    if _stats_classes.get(type(stream).__base__) is not type(stream):
+        raise ValueError("stats are not enabled for this stream")
+
+    stats = stream._stats
+
+    return {
+        "calls": dict(stats["calls"]),
+        "bytes_read": stats["bytes_read"],
+        "bytes_written": stats["bytes_written"],
+        "seeks": stats["seeks"],
+        "searches": stats["searches"],
+        "time": dict(stats["time"]),
+    }
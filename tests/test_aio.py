@@ -0,0 +1,118 @@
+import asyncio
+import socket
+
+import pytest
+from datastream import (
+    AsyncDeserializingStream,
+    AsyncSerializingStream,
+    ByteOrder,
+    DeserializingStream,
+    SerializingStream,
+)
+
+
+def test_async_read():
+    async def main():
+        reader = asyncio.StreamReader()
+        reader.feed_data(bytes.fromhex("00 00 00 2A FF 7F E5 8E 26 40"))
+        reader.feed_data(bytes.fromhex("00 01 00 02 DE AD 00 01"))
+        reader.feed_eof()
+
+        stream = AsyncDeserializingStream(reader, ByteOrder.BIG_ENDIAN)
+
+        assert await stream.read_uint32() == 42
+        assert await stream.read_int8() == -1
+        assert await stream.read_uleb128() == 0x7F
+        assert await stream.read_uleb128() == 624485
+        assert await stream.read_sleb128() == -64
+        assert (await stream.read_array("uint16", 2)).tolist() == [1, 2]
+        assert await stream.read_until(b"\x00") == b"\xDE\xAD\x00"
+        assert await stream.read_bool()
+
+        with pytest.raises(asyncio.IncompleteReadError):
+            await stream.read_uint8()
+
+    asyncio.run(main())
+
+
+def test_async_read_leb128():
+    async def main():
+        reader = asyncio.StreamReader()
+        reader.feed_data(bytes.fromhex("E5 8E 26 C0 BB 78 80 80 01 7F"))
+        reader.feed_eof()
+
+        stream = AsyncDeserializingStream(reader)
+        stream.byteorder = ByteOrder.BIG_ENDIAN
+
+        assert stream.byteorder == ByteOrder.BIG_ENDIAN
+        assert await stream.read_uleb128_safe() == 624485
+        assert await stream.read_sleb128_safe() == -123456
+        # stops after the first byte and one more
+        assert await stream.read_uleb128_safe(1) == 0
+        assert await stream.read_uleb128() == 1
+        assert await stream.read_sleb128() == -1
+
+    asyncio.run(main())
+
+
+def test_async_read_leb128_parity():
+    # the sync and async readers decode the same bytes to the same values,
+    # including values cut off by their byte limit
+    cases = [
+        ("80 80 01", 1),
+        ("80 80 01", -1),
+        ("FF FF FF 7F", 2),
+        ("C0 BB 78", 1),
+        ("C0 BB 78", 5),
+    ]
+
+    async def read(data, limit, name):
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+
+        return await getattr(AsyncDeserializingStream(reader), name)(limit)
+
+    for data, limit in cases:
+        data = bytes.fromhex(data)
+
+        for name in ("read_uleb128_safe", "read_sleb128_safe"):
+            expected = getattr(DeserializingStream(data), name)(limit)
+
+            assert asyncio.run(read(data, limit, name)) == expected, (data, name)
+
+
+def test_async_write():
+    async def main():
+        left, right = socket.socketpair()
+        reader, reader_writer = await asyncio.open_connection(sock=left)
+        _, writer = await asyncio.open_connection(sock=right)
+
+        async with AsyncSerializingStream(writer, ByteOrder.LITTLE_ENDIAN) as stream:
+            stream.write_uint32(42)
+            stream.write_int16(0xFFFF)
+            stream.write_uleb128(624485)
+            stream.write_sleb128(-64)
+            stream.write_array("uint16", [1, 2])
+
+            assert stream.pending() == 14
+
+            await stream.drain()
+
+            assert stream.pending() == 0
+
+            stream.write_double(1.0)
+
+        expected = SerializingStream(byteorder=ByteOrder.LITTLE_ENDIAN)
+        expected.write_uint32(42)
+        expected.write_int16(0xFFFF)
+        expected.write_uleb128(624485)
+        expected.write_sleb128(-64)
+        expected.write_array("uint16", [1, 2])
+        expected.write_double(1.0)
+
+        assert await reader.read() == bytes(expected)
+
+        reader_writer.close()
+
+    asyncio.run(main())
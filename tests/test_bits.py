@@ -0,0 +1,103 @@
+import random
+
+import pytest
+from datastream import BitReader, BitWriter, DeserializingStream, SerializingStream
+
+
+def test_read_bits_msb_first():
+    stream = DeserializingStream(b"\xb5\x0f\xaa")
+
+    with BitReader(stream) as bits:
+        assert bits.read_bits(3) == 0b101
+        assert bits.read_flag()
+        assert bits.read_bits(8) == 0b01010000
+        assert bits.read_bits(4) == 0b1111
+
+    # the reader only consumed the first two bytes
+    assert stream.tell() == 2
+    assert stream.read(1) == b"\xaa"
+
+
+def test_read_bits_lsb_first():
+    stream = DeserializingStream(b"\xb5\x0f")
+    bits = BitReader(stream, msb_first=False)
+
+    assert bits.read_bits(3) == 0b101
+    assert not bits.read_flag()
+    assert bits.read_bits(8) == 0b11111011
+    assert bits.read_bits(4) == 0
+
+    with pytest.raises(EOFError):
+        bits.read_bits(1)
+
+
+def test_read_bits_align():
+    stream = DeserializingStream(bytes(range(16)))
+    bits = BitReader(stream)
+
+    assert bits.read_bits(4) == 0
+    bits.align()
+
+    assert stream.tell() == 1
+    assert bits.read_bits(16) == 0x0102
+    assert bits.read_bits(64) == 0x030405060708090A
+
+
+def test_read_bits_array():
+    stream = DeserializingStream(b"\x12\x34\x56\x78\x9a")
+
+    with BitReader(stream) as bits:
+        assert bits.read_bits(4) == 1
+        values = bits.read_bits_array(12, 3)
+
+    assert values.typecode == "H"
+    assert list(values) == [0x234, 0x567, 0x89A]
+    assert stream.tell() == 5
+
+
+def test_write_bits():
+    stream = SerializingStream()
+
+    with BitWriter(stream) as bits:
+        bits.write_bits(3, 0b101)
+        bits.write_flag(True)
+        bits.write_bits(8, 0b01010000)
+        bits.write_bits(3, 0b111)
+
+    assert bytes(stream) == b"\xb5\x0e"
+
+    stream = SerializingStream()
+
+    with BitWriter(stream, msb_first=False) as bits:
+        bits.write_bits(3, 0b101)
+        bits.write_flag(False)
+        bits.write_bits(8, 0b11111011)
+
+    assert bytes(stream) == b"\xb5\x0f"
+
+    with pytest.raises(ValueError):
+        BitWriter(stream).write_bits(3, 8)
+
+
+@pytest.mark.parametrize("msb_first", [True, False])
+def test_bits_roundtrip(msb_first: bool):
+    rng = random.Random(0) # noqa: S311
+    widths = [rng.randint(1, 64) for _ in range(500)]
+    fields = [rng.getrandbits(width) for width in widths]
+    packed = [rng.getrandbits(7) for _ in range(300)]
+    stream = SerializingStream()
+
+    with BitWriter(stream, msb_first) as bits:
+        for width, value in zip(widths, fields, strict=True):
+            bits.write_bits(width, value)
+
+        bits.write_bits_array(7, packed)
+
+    stream.write_uint8(0xFF)
+    reader = DeserializingStream(bytes(stream))
+
+    with BitReader(reader, msb_first) as bits:
+        assert [bits.read_bits(width) for width in widths] == fields
+        assert list(bits.read_bits_array(7, len(packed))) == packed
+
+    assert reader.read_uint8() == 0xFF
@@ -0,0 +1,121 @@
+import hashlib
+import io
+import zlib
+
+import pytest
+from datastream import BitReader, DeserializingStream, SerializingStream
+
+DATA = bytes(range(256)) * 40
+
+
+@pytest.mark.parametrize(
+    "make_stream",
+    [
+        lambda: DeserializingStream(DATA),
+        lambda: DeserializingStream.from_buffer(DATA),
+        lambda: DeserializingStream.from_source(
+            io.BufferedReader(io.BytesIO(DATA)), window=64
+        ),
+    ],
+    ids=["bytesio", "buffer", "source"],
+)
+def test_checksum_read(make_stream):
+    stream = make_stream()
+    stream.read(10)
+
+    with stream.checksum(zlib.crc32) as crc, stream.checksum(hashlib.sha256) as sha:
+        stream.read_uint32()
+        assert crc.value == zlib.crc32(DATA[10:14])
+
+        stream.read(5000)
+        stream.seek(2000, io.SEEK_CUR)
+        stream.read_uint8()
+
+    assert crc.start == 10
+    assert crc.value == zlib.crc32(DATA[10:7015])
+    assert sha.value == hashlib.sha256(DATA[10:7015]).digest()
+
+    # reading after the block does not change the result
+    stream.read(100)
+    assert crc.value == zlib.crc32(DATA[10:7015])
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{}, {"capacity": 16}, {"gather": True}],
+    ids=["bytesio", "capacity", "gather"],
+)
+def test_checksum_write(kwargs):
+    stream = SerializingStream(**kwargs)
+    stream.write_uint16(len(DATA))
+
+    with stream.checksum(zlib.adler32) as adler:
+        stream.write(DATA)
+        stream.write_uint32(7)
+
+    stream.write_uint32(adler.value)
+    data = bytes(stream)
+
+    assert adler.value == zlib.adler32(data[2:-4])
+    assert adler.hexdigest() == f"{zlib.adler32(data[2:-4]):08x}"
+
+
+def test_checksum_hash_object():
+    stream = DeserializingStream(DATA)
+    sha = hashlib.sha256(b"salt")
+
+    with stream.checksum(sha) as checksum:
+        stream.read(100)
+
+    assert checksum.hexdigest() == hashlib.sha256(b"salt" + DATA[:100]).hexdigest()
+
+    with pytest.raises(ValueError), checksum:
+        pass
+
+
+@pytest.mark.parametrize(
+    "make_stream",
+    [
+        lambda: DeserializingStream(DATA),
+        lambda: DeserializingStream.from_buffer(DATA),
+        lambda: DeserializingStream.from_source(
+            io.BufferedReader(io.BytesIO(DATA)), window=64
+        ),
+    ],
+    ids=["bytesio", "buffer", "source"],
+)
+def test_checksum_seek_back(make_stream):
+    stream = make_stream()
+
+    # the region ends at the furthest position reached, not where the block ends
+    with stream.checksum(zlib.crc32) as crc:
+        stream.read(10)
+        stream.seek(0)
+        stream.read(4)
+
+    assert crc.value == zlib.crc32(DATA[:10])
+
+    with stream.checksum(zlib.crc32) as crc:
+        stream.read(20)
+        stream.seek(6)
+
+        assert crc.value == zlib.crc32(DATA[4:24])
+
+        stream.read(30)
+
+    assert crc.value == zlib.crc32(DATA[4:36])
+
+
+def test_checksum_read_ahead():
+    stream = DeserializingStream(DATA)
+
+    # bytes read ahead and handed back by the stream's own helpers are not hashed
+    with stream.checksum(zlib.crc32) as crc:
+        with BitReader(stream) as bits:
+            bits.read_bits(12)
+
+        index = stream.index_records("uint8", 1)
+        index[0]
+
+    assert stream.tell() == 2
+    assert crc.value == zlib.crc32(DATA[:2])
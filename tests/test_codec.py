@@ -0,0 +1,126 @@
+import dataclasses
+from typing import Annotated
+
+import pytest
+from datastream import ByteOrder, DeserializingStream, SerializingStream, TwoWayStream
+from datastream.codec import (
+    Bool,
+    FieldType,
+    Int8,
+    Int16,
+    Int32,
+    Int64,
+    SLeb128,
+    UInt16,
+    UInt32,
+    ULeb128,
+    ULeb128Bytes,
+    ULeb128Str,
+    codec,
+)
+
+
+@codec
+class Point:
+    x: Annotated[int, Int16]
+    y: Annotated[int, Int16]
+
+
+@codec
+class Message:
+    magic: Annotated[int, UInt32]
+    version: Annotated[int, UInt16]
+    name: ULeb128Str
+    length: Annotated[int, ULeb128]
+    delta: Annotated[int, SLeb128]
+    origin: Point
+    flag: Annotated[bool, Bool]
+    label: Annotated[str, FieldType("string", "uint16", "ascii")]
+    payload: ULeb128Bytes
+
+
+def test_codec_class():
+    assert dataclasses.is_dataclass(Message)
+    assert Message.__slots__ == (
+        "magic",
+        "version",
+        "name",
+        "length",
+        "delta",
+        "origin",
+        "flag",
+        "label",
+        "payload",
+    )
+
+    # adjacent fixed-width fields share one struct call
+    assert "structs['IH']" in Message.__codec_source__
+
+    with pytest.raises(TypeError):
+        @codec
+        class Invalid:
+            value: int
+
+
+def test_codec_roundtrip():
+    message = Message(0xDEADBEEF, 2, "hé", 300, -2, Point(-1, 5), True, "ab", b"\x00")
+    stream = SerializingStream(byteorder=ByteOrder.BIG_ENDIAN)
+
+    message.to_stream(stream)
+
+    assert bytes(stream) == bytes.fromhex(
+        "DE AD BE EF 00 02 03 68 C3 A9 AC 02 7E FF FF 00 05 01 00 02 61 62 01 00"
+    )
+
+    stream = TwoWayStream(bytes(stream), ByteOrder.BIG_ENDIAN)
+
+    assert Message.from_stream(stream) == message
+    assert stream.remaining() == 0
+
+    stream = DeserializingStream(b"\x01\x00\x02\x00", ByteOrder.LITTLE_ENDIAN)
+
+    assert Point.from_stream(stream) == Point(1, 2)
+
+
+def test_codec_signed_wrap():
+    @codec
+    class Signed:
+        a: Annotated[int, Int8]
+        b: Annotated[int, Int16]
+        c: Annotated[int, Int32]
+        d: Annotated[int, Int64]
+
+    # values past the signed maximum wrap around, as they do in the typed writers
+    values = (0xFF, 0x8000, 0xFFFFFFFF, 0x8000000000000000)
+    stream = SerializingStream()
+    Signed(*values).to_stream(stream)
+
+    expected = SerializingStream()
+    expected.write_int8(values[0])
+    expected.write_int16(values[1])
+    expected.write_int32(values[2])
+    expected.write_int64(values[3])
+
+    assert bytes(stream) == bytes(expected)
+
+    stream = DeserializingStream(bytes(stream))
+
+    assert Signed.from_stream(stream) == Signed(-1, -0x8000, -1, -(1 << 63))
+
+
+def test_codec_field_names():
+    # field names that look like the generated locals and globals
+    @codec
+    class Names:
+        x: Point
+        x_codec: Annotated[int, UInt16]
+        _0: Annotated[int, UInt16]
+        structs: ULeb128Str
+        stream: Point
+
+    value = Names(Point(1, 2), 3, 4, "a", Point(5, 6))
+    stream = TwoWayStream()
+    value.to_stream(stream)
+    stream.seek(0)
+
+    assert Names.from_stream(stream) == value
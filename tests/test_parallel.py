@@ -0,0 +1,40 @@
+from datastream import ByteOrder, DeserializingStream, Record, SerializingStream
+from datastream.parallel import parallel_map
+
+Entry = Record("Entry", [("id", "uint16"), ("length", "uleb128")])
+
+
+def decode_chunk(stream):
+    return stream.size(), stream.read_uint16()
+
+
+def decode_entry(stream):
+    return tuple(stream.read_record(Entry))
+
+
+def test_parallel_map():
+    data = bytes.fromhex("00 01 FF 00 02 00 03 EE EE")
+    stream = DeserializingStream(data, ByteOrder.BIG_ENDIAN)
+
+    assert parallel_map(stream, [0, 3, 5], decode_chunk, workers=2) == [
+        (3, 1),
+        (2, 2),
+        (4, 3),
+    ]
+    assert parallel_map(stream, [], decode_chunk) == []
+
+
+def test_parallel_map_file(tmp_path):
+    writer = SerializingStream(byteorder=ByteOrder.LITTLE_ENDIAN)
+
+    for i in range(100):
+        writer.write_record(Entry, (i, i * 1000))
+
+    path = tmp_path / "entries.bin"
+    path.write_bytes(bytes(writer))
+
+    with DeserializingStream.from_file(path, ByteOrder.LITTLE_ENDIAN) as stream:
+        index = stream.index_records(Entry)
+        results = parallel_map(stream, index, decode_entry, workers=2)
+
+    assert results == [(i, i * 1000) for i in range(100)]
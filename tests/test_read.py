@@ -1,8 +1,10 @@
+import array
+import concurrent.futures
 import io
 import struct
 
 import pytest
-from datastream import DeserializingStream, TwoWayStream
+from datastream import ByteOrder, DeserializingStream, SerializingStream, TwoWayStream
 
 
 def test_stream_read():
@@ -77,6 +79,49 @@ def test_stream_read_until():
     assert stream.read_until(b"\x00") == b"\xDE\xAD\xBE\xEF\x00"
 
 
+def test_stream_read_until_options():
+    stream = DeserializingStream(b"ab\r\nstraddle\r\nname\x00tail")
+
+    # the terminator straddles the read stride of the old implementation
+    assert stream.read_until(b"\r\n", include_terminator=False) == b"ab"
+    assert stream.tell() == 4
+
+    with pytest.raises(ValueError):
+        stream.read_until(b"\r\n", max_length=4)
+
+    assert stream.tell() == 4
+    assert stream.read_until(b"\r\n", max_length=8) == b"straddle\r\n"
+    assert stream.read_cstring() == "name"
+
+    with pytest.raises(EOFError):
+        stream.read_until(b"\x00")
+
+    assert stream.read(4) == b"tail"
+
+    stream = DeserializingStream(b"first\r\nsecond\n")
+
+    assert stream.read_line() == "first"
+    assert stream.read_line(keepends=True) == "second\n"
+
+
+def test_stream_read_strings():
+    data = bytes.fromhex("03 61 62 63 02 68 69 03 61 62 63 05 61")
+
+    for stream in (
+        DeserializingStream(data),
+        DeserializingStream.from_buffer(data),
+        DeserializingStream.from_source(io.BufferedReader(io.BytesIO(data)), window=4),
+    ):
+        table = {}
+        strings = stream.read_strings(3, intern=table)
+
+        assert strings == ["abc", "hi", "abc"]
+        assert strings[0] is strings[2]
+
+        with pytest.raises(struct.error):
+            stream.read_string()
+
+
 def test_stream_read_int64():
     iostream = io.BytesIO()
     iostream.write(bytes.fromhex("FF FF FF FF FF FF FF FF"))
@@ -163,3 +208,356 @@ def test_stream_read_uint8():
     stream = DeserializingStream(iostream)
 
     assert stream.read_uint8() == 0xFF
+
+
+def test_stream_byteorder_change():
+    stream = DeserializingStream(bytes.fromhex("00 00 00 01 00 00 00 01"))
+
+    stream.byteorder = ByteOrder.BIG_ENDIAN
+
+    assert stream.read_uint32() == 1
+
+    stream.byteorder = ByteOrder.LITTLE_ENDIAN
+
+    assert stream.read_uint32() == 0x01000000
+
+
+def test_stream_from_buffer():
+    data = bytearray.fromhex("FF FF FF FF 01 00 DE AD BE EF")
+    stream = DeserializingStream.from_buffer(data, ByteOrder.LITTLE_ENDIAN)
+
+    assert stream.size() == 10
+    assert stream.read_int32() == -1
+    assert stream.read_format("H") == 1
+    assert stream.read(4) == b"\xDE\xAD\xBE\xEF"
+    assert stream.remaining() == 0
+
+    with pytest.raises(struct.error):
+        stream.read_uint8()
+
+
+def test_stream_from_buffer_views():
+    data = array.array("B", bytes.fromhex("DE AD BE EF"))
+    stream = DeserializingStream.from_buffer(data, views=True)
+
+    view = stream.read(2)
+
+    assert isinstance(view, memoryview)
+    assert view == b"\xDE\xAD"
+
+    # views share memory with the source buffer
+    data[0] = 0
+
+    assert view == b"\x00\xAD"
+
+
+def test_stream_from_file(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(bytes.fromhex("00 00 00 2A DE AD BE EF 00"))
+
+    with DeserializingStream.from_file(path, ByteOrder.BIG_ENDIAN) as stream:
+        assert stream.size() == 9
+        assert stream.read_uint32() == 42
+        assert stream.peek(2) == b"\xDE\xAD"
+        assert stream.search(b"\xBE\xEF") == 6
+
+        substream = stream.substream(4, 8)
+
+        assert substream.read_uint32() == 0xDEADBEEF
+
+        stream.seek(4)
+
+        assert stream.read_until(b"\x00") == b"\xDE\xAD\xBE\xEF\x00"
+
+
+def test_twoway_stream_from_file(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(bytes(4))
+
+    with TwoWayStream.from_file(path, ByteOrder.BIG_ENDIAN) as stream:
+        stream.write_uint16(0xBEEF)
+        stream.seek(0)
+
+        assert stream.read_uint16() == 0xBEEF
+
+        with pytest.raises(ValueError):
+            stream.write_uint32(0)
+
+    assert path.read_bytes() == bytes.fromhex("BE EF 00 00")
+
+
+def test_stream_substream():
+    stream = DeserializingStream(bytes.fromhex("00 01 02 03 04 05 06 07"))
+    stream.seek(6)
+
+    substream = stream.substream(2, 6)
+
+    assert substream.tell() == 0
+    assert substream.size() == 4
+    assert substream.read_uint8() == 2
+    assert substream.remaining() == 3
+    assert stream.tell() == 6
+
+    nested = substream.substream(1, 3)
+
+    assert nested.read(8) == b"\x03\x04"
+
+
+def test_stream_substream_shares_memory():
+    data = bytearray(8)
+    stream = DeserializingStream.from_buffer(data)
+    substream = stream.substream(4, 8)
+
+    data[4] = 0xFF
+
+    assert substream.read_uint8() == 0xFF
+
+
+def test_stream_substream_walk():
+    data = bytes(range(250)) * 16
+    stream = DeserializingStream(data)
+    chunks = []
+
+    while stream.remaining():
+        pos = stream.tell()
+        chunks.append(stream.substream(pos, pos + 1000))
+        stream.seek(pos + 1000)
+
+    stream.cursor().remaining()
+
+    assert b"".join(chunk.read(1000) for chunk in chunks) == data
+    # size() and remaining() never made the BytesIO copy the bytes it shares
+    assert stream._backing_stream.getvalue() is data
+
+
+def test_stream_clone_copy_on_write():
+    stream = DeserializingStream(bytes.fromhex("00 01 02 03"))
+    clone = stream.clone()
+
+    clone.write(b"\xFF")
+
+    assert stream.read(4) == b"\x00\x01\x02\x03"
+    assert clone.substream(0, 4).read(4) == b"\xFF\x01\x02\x03"
+
+
+def test_stream_search():
+    stream = DeserializingStream(bytes.fromhex("AA BB AA BB AA 00 AA"))
+
+    assert stream.search(b"\xAA\xBB") == 0
+    assert stream.search(b"\xBB\xAA", 2) == 3
+    assert stream.search(b"\xAA\x00", end=5) == -1
+    assert stream.rsearch(b"\xAA\xBB") == 2
+    assert stream.rsearch(b"\xAA") == 6
+    assert stream.rsearch(b"\xAA", end=-1) == 4
+    assert stream.search(b"\xCC") == -1
+
+    stream.seek(1)
+
+    assert stream.search(b"\xAA\xBB") == 2
+    assert stream.tell() == 1
+
+
+def test_stream_search_all():
+    data = bytes.fromhex("AA AA AA 00 AA")
+
+    for stream in (
+        DeserializingStream(data),
+        DeserializingStream.from_buffer(data),
+        DeserializingStream.from_buffer(array.array("B", data)),
+    ):
+        assert list(stream.search_all(b"\xAA\xAA")) == [0, 1]
+        assert list(stream.search_all(b"\xAA", 1, 4)) == [1, 2]
+        assert list(stream.search_all(b"")) == [0, 1, 2, 3, 4, 5]
+
+        substream = stream.substream(2, 5)
+
+        assert list(substream.search_all(b"\xAA")) == [0, 2]
+
+
+def test_stream_read_array():
+    data = bytes.fromhex("00 00 00 01 00 00 00 02 FF FF FF FF")
+
+    for stream in (
+        DeserializingStream(data, ByteOrder.BIG_ENDIAN),
+        DeserializingStream.from_buffer(data, ByteOrder.BIG_ENDIAN),
+    ):
+        assert stream.read_array("I", 2).tolist() == [1, 2]
+        assert stream.read_int16_array(2).tolist() == [-1, -1]
+
+        stream.seek(0)
+
+        assert stream.read_array("uint16", 2).tolist() == [0, 1]
+
+        with pytest.raises(struct.error):
+            stream.read_uint32_array(3)
+
+        # rejected before anything is read
+        stream.seek(4)
+
+        with pytest.raises(ValueError):
+            stream.read_array("I", -1)
+
+        assert stream.tell() == 4
+
+    stream = DeserializingStream(data, ByteOrder.LITTLE_ENDIAN)
+
+    assert stream.read_uint32_array(3).tolist() == [0x01000000, 0x02000000, 0xFFFFFFFF]
+
+    with pytest.raises(ValueError):
+        stream.read_array("s", 1)
+
+
+def test_stream_read_array_numpy():
+    np = pytest.importorskip("numpy")
+
+    stream = DeserializingStream(bytes.fromhex("00 01 00 02"), ByteOrder.BIG_ENDIAN)
+    values = stream.read_uint16_array(2, numpy=True)
+
+    assert values.dtype == np.dtype(">u2")
+    assert values.tolist() == [1, 2]
+
+
+def test_stream_read_leb128():
+    stream = DeserializingStream(bytes.fromhex("7F E5 8E 26 40 7F 80 7F"))
+
+    assert stream.read_uleb128() == 0x7F
+    assert stream.read_uleb128() == 624485
+    assert stream.read_sleb128() == -64
+    assert stream.read_sleb128() == -1
+    assert stream.read_sleb128() == -128
+
+
+def test_stream_read_leb128_many():
+    data = bytes.fromhex("02 7F E5 8E 26 80 01")
+
+    stream = DeserializingStream(data)
+
+    assert stream.read_uleb128_many(2) == ([2, 127], 2)
+    assert stream.read_uleb128_many(max_bytes=4) == ([624485], 3)
+    assert stream.read_uleb128_many() == ([128], 2)
+    assert stream.read_uleb128_many() == ([], 0)
+
+    stream = DeserializingStream.from_buffer(data)
+
+    assert stream.read_sleb128_many(typecode="q") == (
+        array.array("q", [2, -1, 624485, 128]),
+        7,
+    )
+
+
+def test_stream_read_leb128_many_numpy():
+    pytest.importorskip("numpy")
+
+    values = [0, 1, 63, 64, 127, 128, 2**31, -1, -64, -65, -(2**31), -(2**62)] * 1000
+    stream = TwoWayStream()
+
+    for value in values:
+        stream.write_sleb128(value)
+
+    stream.seek(0)
+
+    assert stream.read_sleb128_many(len(values)) == (values, stream.size())
+
+    stream = TwoWayStream()
+
+    for value in values:
+        stream.write_uleb128(abs(value))
+
+    stream.write(b"\x80")
+    stream.seek(0)
+
+    assert stream.read_uleb128_many() == (
+        [abs(value) for value in values],
+        stream.size() - 1,
+    )
+
+    # values wider than 64 bits are decoded as well
+    stream.write_uleb128(2**70)
+    stream.seek(0)
+
+    assert stream.read_uleb128_many()[0][-1] == 2**70
+
+
+def test_stream_read_at():
+    data = bytes.fromhex("DE AD BE EF 00 00 80 3F")
+
+    for stream in (
+        DeserializingStream(data, ByteOrder.BIG_ENDIAN),
+        DeserializingStream.from_buffer(data, ByteOrder.BIG_ENDIAN),
+    ):
+        stream.seek(2)
+
+        assert stream.read_uint32_at(0) == 0xDEADBEEF
+        assert stream.read_int8_at(1) == -0x53
+        assert stream.read_bool_at(0)
+        assert stream.read_at(3, 2) == b"\xEF\x00"
+        assert stream.peek(2) == b"\xBE\xEF"
+        assert stream.seekpeek(6, 4) == b"\x80\x3F"
+        assert stream.tell() == 2
+
+        stream.byteorder = ByteOrder.LITTLE_ENDIAN
+
+        assert stream.read_float_at(4) == 1.0
+
+        with pytest.raises(struct.error):
+            stream.read_uint64_at(4)
+
+        with pytest.raises(ValueError):
+            stream.read_at(-1, 1)
+
+
+def test_stream_read_at_while_writing():
+    data = bytes(range(16))
+    stream = TwoWayStream(data, ByteOrder.BIG_ENDIAN)
+    stream.seek(0, io.SEEK_END)
+
+    for i in range(4):
+        stream.write_uint16(i)
+
+        assert stream.seekpeek(0, 2) == b"\x00\x01"
+        assert stream.read_uint16_at(16 + i * 2) == i
+
+    assert stream.tell() == 24
+
+    # read-only streams keep sharing the bytes they were created from
+    stream = DeserializingStream(data)
+
+    assert stream.read_at(4, 2) == b"\x04\x05"
+    assert stream.read_uint8_at(15) == 15
+    assert stream._backing_stream.getvalue() is data
+
+
+def test_stream_cursor_threads():
+    data = array.array("I", range(4096)).tobytes()
+    stream = DeserializingStream.from_buffer(data, ByteOrder.NATIVE_ENDIAN)
+
+    def total(start):
+        cursor = stream.cursor()
+        cursor.seek(start * 4)
+
+        return sum(cursor.read_uint32() for _ in range(1024))
+
+    with concurrent.futures.ThreadPoolExecutor(4) as executor:
+        sums = list(executor.map(total, range(0, 4096, 1024)))
+
+    assert sum(sums) == sum(range(4096))
+    assert stream.tell() == 0
+
+    cursor = stream.cursor()
+    cursor.write(b"\xFF")
+
+    # cursors copy the buffer before writing to it
+    assert stream.read_uint8() == 0
+
+
+def test_stream_cursor_sees_writes():
+    buffered = SerializingStream(capacity=16)
+    buffered.write(b"abcdef")
+
+    # in-place writes show through cursors over a buffer, BytesIO ones are copies
+    for stream, expected in ((TwoWayStream(b"abcdef"), b"ab"), (buffered, b"Zb")):
+        cursor = stream.cursor()
+        stream.seek(0)
+        stream.write(b"Z")
+
+        assert cursor.read(2) == expected
@@ -0,0 +1,245 @@
+import os
+import struct
+
+import pytest
+from datastream import (
+    ByteOrder,
+    DeserializingStream,
+    Record,
+    RecordIndex,
+    SerializingStream,
+    TwoWayStream,
+)
+from datastream.buffer import map_file
+
+Header = Record(
+    "Header",
+    [("magic", "uint32"), ("major", "uint16"), ("minor", "uint8"), ("flag", "bool")],
+)
+Entry = Record(
+    "Entry", [("id", "uint16"), ("length", "uleb128"), ("offset", "int32")]
+)
+
+
+def test_record_layout():
+    assert Header.format == "IHB?"
+    assert Header.size == 8
+    assert Entry.format is None
+    assert Entry.size is None
+
+    with pytest.raises(ValueError):
+        Record("Invalid", [("field", "uint128")])
+
+
+def test_read_record():
+    stream = DeserializingStream(
+        bytes.fromhex("DE AD BE EF 00 01 02 01"), ByteOrder.BIG_ENDIAN
+    )
+    header = stream.read_record(Header)
+
+    assert header == Header(0xDEADBEEF, 1, 2, True)
+    assert header.magic == 0xDEADBEEF
+    assert stream.remaining() == 0
+
+
+def test_read_record_native_is_unaligned():
+    stream = DeserializingStream(bytes(8))
+
+    stream.read_record(Header)
+
+    assert stream.tell() == 8
+
+
+def test_read_record_varint():
+    stream = DeserializingStream(
+        bytes.fromhex("00 07 05 FF FF FF FF"), ByteOrder.BIG_ENDIAN
+    )
+
+    assert stream.read_record(Entry) == Entry(7, 5, -1)
+
+
+def test_iter_records():
+    data = bytes.fromhex("00 00 00 01 00 02 03 00") * 3
+
+    for stream in (
+        DeserializingStream(data, ByteOrder.BIG_ENDIAN),
+        DeserializingStream.from_buffer(data, ByteOrder.BIG_ENDIAN),
+    ):
+        records = list(stream.iter_records(Header, 3))
+
+        assert records == [Header(1, 2, 3, False)] * 3
+
+        stream.seek(0)
+
+        with pytest.raises(struct.error):
+            stream.iter_records(Header, 4)
+
+
+def test_write_record():
+    stream = SerializingStream(byteorder=ByteOrder.BIG_ENDIAN)
+
+    stream.write_record(Header, Header(0xDEADBEEF, 1, 2, True))
+    stream.write_record(Entry, (7, 5, -1))
+
+    assert bytes(stream) == bytes.fromhex(
+        "DE AD BE EF 00 01 02 01 00 07 05 FF FF FF FF"
+    )
+
+
+def test_write_record_signed_wrap():
+    # values past the signed maximum wrap around, as they do in the typed writers
+    for record in (
+        Record("Fixed", [("a", "int8"), ("b", "uint8"), ("c", "int64")]),
+        Record("Mixed", [("a", "int8"), ("n", "sleb128"), ("c", "int64")]),
+    ):
+        stream = SerializingStream()
+        stream.write_record(record, (0xFF, 0x80, 0x8000000000000000))
+
+        expected = SerializingStream()
+        expected.write_int8(0xFF)
+        getattr(expected, f"write_{record.fields[1][1]}")(0x80)
+        expected.write_int64(0x8000000000000000)
+
+        assert bytes(stream) == bytes(expected)
+
+
+def test_twoway_record_roundtrip():
+    stream = TwoWayStream(byteorder=ByteOrder.LITTLE_ENDIAN)
+
+    stream.write_record(Entry, (1, 300, -2))
+    stream.write_record(Entry, (2, 0, 3))
+    stream.seek(0)
+
+    assert list(stream.iter_records(Entry, 2)) == [Entry(1, 300, -2), Entry(2, 0, 3)]
+
+
+def test_index_records():
+    stream = SerializingStream(byteorder=ByteOrder.BIG_ENDIAN)
+
+    for i in range(10):
+        stream.write_record(Entry, (i, i * 100, -i))
+
+    stream = DeserializingStream(bytes(stream), ByteOrder.BIG_ENDIAN)
+    index = stream.index_records(Entry)
+
+    assert isinstance(index, RecordIndex)
+    assert stream.tell() == 0
+    assert len(index) == 10
+    assert index[3] == Entry(3, 300, -3)
+    assert index[-1] == Entry(9, 900, -9)
+    assert list(index[2:8:3]) == [Entry(2, 200, -2), Entry(5, 500, -5)]
+    assert stream.tell() == 0
+
+    with pytest.raises(struct.error):
+        stream.index_records(Entry, 11)
+
+
+def test_index_records_fixed_and_prefixed(tmp_path):
+    data = bytes.fromhex("00 00 00 01 00 02 03 00") * 4
+    stream = DeserializingStream(b"\x00" + data, ByteOrder.BIG_ENDIAN)
+    stream.seek(1)
+
+    index = stream.index_records(Header, 3)
+
+    assert list(index.offsets) == [1, 9, 17]
+    assert index[2] == Header(1, 2, 3, False)
+
+    stream = DeserializingStream(bytes.fromhex("02 61 62 00 01 63"))
+    path = tmp_path / "blobs.idx"
+    index = stream.index_records("uleb128", path=path)
+
+    assert list(index) == [b"ab", b"", b"c"]
+    assert path.exists()
+
+    # the saved offsets are reused instead of scanning the stream again
+    path.write_bytes(path.read_bytes()[:-8] + (3).to_bytes(8, "little"))
+
+    assert list(stream.index_records("uleb128", path=path)) == [b"ab", b"", b""]
+
+
+def test_index_records_saved_key(tmp_path):
+    path = tmp_path / "blobs.idx"
+    stream = DeserializingStream(bytes.fromhex("02 61 62 00 01 63"))
+
+    def tamper():
+        # a reused file would return b"" for the last record
+        path.write_bytes(path.read_bytes()[:-8] + (3).to_bytes(8, "little"))
+
+    stream.index_records("uleb128", path=path)
+    tamper()
+
+    # another count, start, layout or contents of the same size are reindexed
+    assert list(stream.index_records("uleb128", 3, path=path))[-1] == b"c"
+
+    tamper()
+    stream.seek(3)
+
+    assert list(stream.index_records("uleb128", path=path)) == [b"", b"c"]
+
+    stream.seek(0)
+    stream.index_records("uleb128", path=path)
+    tamper()
+
+    assert list(stream.index_records("uint8", path=path))[-1] == b"c"
+
+    stream.index_records("uleb128", path=path)
+    tamper()
+    stream = DeserializingStream(bytes.fromhex("01 61 01 62 01 63"))
+
+    assert list(stream.index_records("uleb128", path=path)) == [b"a", b"b", b"c"]
+
+
+def test_index_records_saved_hit_skips_scan(tmp_path, monkeypatch):
+    path = tmp_path / "blobs.idx"
+    data = tmp_path / "blobs.bin"
+    data.write_bytes(bytes.fromhex("02 61 62 00 01 63"))
+    stream = DeserializingStream.from_file(data)
+    stream.index_records("uleb128", path=path)
+
+    def scan(self, kind):
+        raise AssertionError("the stream was scanned")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(DeserializingStream, "_read_length", scan)
+        index = stream.index_records("uleb128", path=path)
+
+    assert list(index) == [b"ab", b"", b"c"]
+
+    stream.close()
+
+    # a file rewritten with contents of the same size is reindexed
+    data.write_bytes(bytes.fromhex("01 61 01 62 01 63"))
+    os.utime(data, ns=(0, 0))
+    stream = DeserializingStream.from_file(data)
+
+    assert list(stream.index_records("uleb128", path=path)) == [b"a", b"b", b"c"]
+
+    stream.close()
+
+
+def test_index_records_saved_contents(tmp_path):
+    path = tmp_path / "entries.idx"
+    record = Record("E", [("a", "uint8"), ("n", "uleb128")])
+    data = bytearray(b"\x01\x02" * 70000)
+    DeserializingStream(bytes(data)).index_records(record, path=path)
+
+    # a change of the same size far from both ends of an in-memory stream, which
+    # merges two records into one
+    data[70001:70004] = b"\x81\x80\x00"
+
+    assert len(DeserializingStream(bytes(data)).index_records(record, path=path)) == (
+        69999
+    )
+
+    # a read-only mapped file whose contents were copied on write no longer
+    # matches it
+    file = tmp_path / "entries.bin"
+    file.write_bytes(b"\x01\x02" * 4)
+    stream = TwoWayStream(map_file(file))
+    stream.index_records(record, path=path)
+    stream.write(b"\x01\x81")
+
+    assert stream._backing_stream._path is None
+    assert len(stream.index_records(record, path=path)) == 3
+
+    stream.close()
@@ -0,0 +1,168 @@
+import array
+import gzip
+import io
+import socket
+import struct
+import threading
+
+import pytest
+from datastream import ByteOrder, DeserializingStream, SerializingStream
+
+
+class ChunkedReader(io.RawIOBase):
+    """
+    A non-seekable source that returns at most `chunk` bytes per read.
+    """
+
+    def __init__(self, data: bytes, chunk: int = 3):
+        self._data = memoryview(data)
+        self._chunk = chunk
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._chunk, len(self._data))
+        buffer[:size] = self._data[:size]
+        self._data = self._data[size:]
+
+        return size
+
+
+def test_source_read():
+    data = bytes.fromhex("00 00 00 2A FF FF 01 02 03 04 05")
+    stream = DeserializingStream(ChunkedReader(data), ByteOrder.BIG_ENDIAN)
+
+    assert stream.read_uint32() == 42
+    assert stream.peek(2) == b"\xFF\xFF"
+    assert stream.read_int16() == -1
+    assert stream.tell() == 6
+    assert stream.read(3) == b"\x01\x02\x03"
+    assert stream.read(10) == b"\x04\x05"
+
+    with pytest.raises(struct.error):
+        stream.read_uint8()
+
+
+def test_source_window():
+    data = bytes(range(64))
+    stream = DeserializingStream.from_source(ChunkedReader(data), window=8)
+
+    assert stream.read(20) == data[:20]
+    assert stream.read_uint8() == 20
+    assert stream.search(b"\x1A") == 26
+    assert stream.search(b"\x30") == -1
+    assert stream.read_until(b"\x1B") == data[21:28]
+
+    stream.seek(27)
+
+    assert stream.read_uint8() == 27
+
+    with pytest.raises(io.UnsupportedOperation):
+        stream.seek(0)
+
+    stream.seek(60)
+
+    assert stream.read(8) == data[60:]
+
+
+def test_source_peek():
+    data = bytes(range(64))
+    stream = DeserializingStream.from_source(ChunkedReader(data), window=8)
+
+    assert stream.read(10) == data[:10]
+    assert stream.peek(8) == data[10:18]
+    assert stream.seekpeek(12, 6) == data[12:18]
+
+    # larger than the window: fails without moving the position
+    with pytest.raises(ValueError):
+        stream.peek(200)
+
+    with pytest.raises(ValueError):
+        stream.seekpeek(20, 4)
+
+    assert stream.tell() == 10
+    assert stream.read(4) == data[10:14]
+
+    stream.seek(62)
+
+    assert stream.peek(8) == data[62:]
+    assert stream.tell() == 62
+
+
+def test_source_read_until():
+    data = b"x" * 100 + b"\nrest"
+    stream = DeserializingStream.from_source(ChunkedReader(data), window=16)
+
+    # the terminator lies past the window, not past the end of the stream
+    with pytest.raises(ValueError, match="window of 16 bytes"):
+        stream.read_until(b"\n")
+
+    with pytest.raises(ValueError, match="within 8 bytes"):
+        stream.read_until(b"\n", 8)
+
+    assert stream.tell() == 0
+
+    stream.seek(96)
+
+    assert stream.read_until(b"\n") == b"xxxx\n"
+
+    with pytest.raises(EOFError):
+        stream.read_until(b"\n")
+
+    assert stream.read(8) == b"rest"
+
+
+def test_source_gzip():
+    compressed = gzip.compress(b"\x01\x00\x02\x00" * 10000)
+
+    with gzip.GzipFile(fileobj=io.BytesIO(compressed)) as source:
+        stream = DeserializingStream(source, ByteOrder.LITTLE_ENDIAN)
+
+        assert stream.read_uint16_array(20000).tolist() == [1, 2] * 10000
+
+
+def test_source_socket():
+    left, right = socket.socketpair()
+
+    def send():
+        with left:
+            for value in range(100):
+                left.sendall(value.to_bytes(4, "big"))
+
+    sender = threading.Thread(target=send)
+    sender.start()
+
+    with right:
+        stream = DeserializingStream.from_source(right, ByteOrder.BIG_ENDIAN, 16)
+
+        assert [stream.read_uint32() for _ in range(100)] == list(range(100))
+
+    sender.join()
+
+
+def test_source_leb128_many():
+    values = [0, 1, 127, 128, 300, 2**40, 5] * 20
+    signed = [-1, -300, 64]
+    stream = SerializingStream()
+    stream.write_uleb128_many(values[:5])
+    head = stream.tell()
+    stream.write_uleb128_many(values[5:])
+    body = stream.tell() - head
+    stream.write_sleb128_many(signed)
+    # a value cut off by the end of the data
+    stream.write(b"\x80")
+    data = bytes(stream)
+
+    # a window smaller than the data, so values straddle its end
+    reader = DeserializingStream.from_source(ChunkedReader(data), window=16)
+
+    assert reader.read_uleb128_many(5) == (values[:5], head)
+    assert reader.read_uleb128_many(len(values) - 5, typecode="Q") == (
+        array.array("Q", values[5:]),
+        body,
+    )
+    assert reader.read_sleb128_many(max_bytes=3) == (signed[:2], 3)
+    assert reader.read_sleb128_many() == (signed[2:], 2)
+    assert reader.tell() == len(data) - 1
+    assert reader.read(4) == b"\x80"
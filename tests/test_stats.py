@@ -0,0 +1,122 @@
+import pytest
+from datastream import (
+    ByteOrder,
+    DeserializingStream,
+    Record,
+    SerializingStream,
+    TwoWayStream,
+)
+
+
+def test_stream_stats():
+    stream = TwoWayStream(byteorder=ByteOrder.BIG_ENDIAN)
+
+    with pytest.raises(ValueError):
+        stream.stats()
+
+    stream.enable_stats()
+
+    stream.write_uint32(0xDEADBEEF)
+    stream.write_uleb128(300)
+    stream.seek(0)
+
+    assert stream.read_uint32() == 0xDEADBEEF
+    assert stream.read_uleb128() == 300
+    assert stream.search(b"\xEF", 0) == 3
+
+    stats = stream.stats()
+
+    assert stats["calls"] == {
+        "write_uint32": 1,
+        "write_uleb128": 1,
+        "seek": 1,
+        "read_uint32": 1,
+        "read_uleb128": 1,
+        "search": 1,
+    }
+    assert stats["bytes_read"] == 6
+    assert stats["bytes_written"] == 6
+    assert stats["seeks"] == 1
+    assert stats["searches"] == 1
+    assert stats["time"] == {}
+    assert isinstance(stream, TwoWayStream)
+
+    stream.disable_stats()
+
+    assert type(stream) is TwoWayStream
+
+    with pytest.raises(ValueError):
+        stream.stats()
+
+
+def test_stream_stats_hook():
+    calls = []
+    stream = DeserializingStream(bytes(16))
+
+    stream.enable_stats(lambda *args: calls.append(args), timing=True)
+    stream.read_uint64()
+    stream.read_array("uint16", 2)
+
+    assert [call[1:3] for call in calls] == [("read_uint64", 8), ("read_array", 4)]
+    assert all(call[0] is stream and call[3] >= 0 for call in calls)
+    assert set(stream.stats()["time"]) == {"read_uint64", "read_array"}
+
+    # streams derived from an instrumented stream keep their own counters
+    clone = stream.clone()
+    clone.read_uint8()
+
+    assert clone.stats()["bytes_read"] == 1
+    assert stream.stats()["bytes_read"] == 12
+
+    # other streams are not affected
+    assert type(DeserializingStream(b"")) is DeserializingStream
+
+
+def test_stream_stats_positional_reads():
+    stream = DeserializingStream(bytes(range(16)))
+    stream.enable_stats()
+    stream.read_uint8()
+
+    # reads that leave the position alone count the bytes they return
+    assert stream.read_uint32_at(4) == 0x07060504
+    assert stream.read_format_at("H", 8) == 0x0908
+    assert stream.read_bool_at(1)
+    assert stream.read_at(10, 100) == bytes(range(10, 16))
+    assert stream.peek(2) == b"\x01\x02"
+    assert stream.seekpeek(0, 3) == b"\x00\x01\x02"
+
+    stats = stream.stats()
+
+    assert stream.tell() == 1
+    assert stats["bytes_read"] == 1 + 4 + 2 + 1 + 6 + 2 + 3
+    assert stats["seeks"] == 0
+
+
+def test_stream_stats_generators():
+    record = Record("Entry", [("id", "uint8"), ("length", "uleb128")])
+    stream = SerializingStream()
+
+    for i in range(3):
+        stream.write_record(record, record(i, 100 * i))
+
+    data = bytes(stream)
+    stream = DeserializingStream(data + b"\x00\x01\x00\x01")
+    stream.enable_stats(timing=True)
+
+    # the records are read as they are iterated, not when iter_records returns
+    records = stream.iter_records(record, 3)
+
+    assert stream.stats()["bytes_read"] == 0
+    assert [entry.id for entry in records] == [0, 1, 2]
+
+    occurrences = stream.search_all(b"\x00\x01")
+
+    assert stream.stats()["searches"] == 0
+    assert list(occurrences) == [len(data), len(data) + 2]
+
+    stats = stream.stats()
+
+    assert stats["calls"] == {"iter_records": 1, "search_all": 1}
+    assert stats["bytes_read"] == len(data)
+    assert stats["searches"] == 1
+    assert set(stats["time"]) == {"iter_records", "search_all"}
@@ -1,8 +1,16 @@
+import array
 import io
+import os
+import socket
 import struct
 
 import pytest
-from datastream import ByteOrder, SerializingStream, TwoWayStream
+from datastream import (
+    ByteOrder,
+    DeserializingStream,
+    SerializingStream,
+    TwoWayStream,
+)
 
 
 def test_serializer_constructor():
@@ -26,6 +34,20 @@ def test_twoway_stream_write():
     assert bytes(stream) == bytes.fromhex("FF FF FF FF")
 
 
+def test_twoway_stream_rejects_files(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(bytes(8))
+
+    with open(path, "r+b") as file, pytest.raises(ValueError, match="from_file"):
+        TwoWayStream(file)
+
+    stream = TwoWayStream.from_file(path)
+    stream.write_uint32(0xFFFFFFFF)
+    stream.close()
+
+    assert path.read_bytes() == bytes.fromhex("FF FF FF FF 00 00 00 00")
+
+
 def test_serializer_write_format():
     iostream = io.BytesIO()
     stream = SerializingStream(iostream)
@@ -157,3 +179,331 @@ def test_serializer_write_bytes():
     stream.write(b"\x00\x01\x02\x03")
 
     assert bytes(stream) == bytes.fromhex("00 01 02 03")
+
+
+def test_serializer_byteorder_change():
+    stream = SerializingStream(byteorder=ByteOrder.BIG_ENDIAN)
+
+    stream.write_uint16(1)
+    stream.byteorder = ByteOrder.LITTLE_ENDIAN
+    stream.write_uint16(1)
+
+    assert bytes(stream) == bytes.fromhex("00 01 01 00")
+
+
+def test_serializer_substream_write():
+    stream = SerializingStream()
+    stream.write(bytes.fromhex("00 01 02 03"))
+
+    substream = stream.substream(2, 4)
+    substream.seek(0, io.SEEK_END)
+    substream.write_uint8(0xFF)
+
+    assert bytes(substream) == bytes.fromhex("02 03 FF")
+    assert bytes(stream) == bytes.fromhex("00 01 02 03")
+
+
+def test_serializer_clone_copy_on_write():
+    stream = SerializingStream(io.BytesIO(bytes.fromhex("00 01"))).substream(0, 2)
+    stream.seek(0, io.SEEK_END)
+    stream.write_uint8(0xFF)
+
+    clone = stream.clone()
+    stream.write_uint8(0xFF)
+    clone.write_uint8(0xEE)
+
+    assert bytes(stream) == bytes.fromhex("00 01 FF FF")
+    assert bytes(clone) == bytes.fromhex("EE 01 FF")
+
+
+def test_serializer_write_array():
+    stream = SerializingStream(byteorder=ByteOrder.BIG_ENDIAN)
+
+    stream.write_array("uint16", [1, 2])
+    stream.write_array("h", array.array("h", [-1]))
+    stream.write_int32_array(array.array("b", [1]))
+
+    assert bytes(stream) == bytes.fromhex("00 01 00 02 FF FF 00 00 00 01")
+
+    stream = SerializingStream(byteorder=ByteOrder.LITTLE_ENDIAN)
+    values = array.array("H", [1, 2])
+
+    stream.write_uint16_array(values)
+
+    assert bytes(stream) == bytes.fromhex("01 00 02 00")
+    assert values.tolist() == [1, 2]
+
+    with pytest.raises(OverflowError):
+        stream.write_uint8_array([0x100])
+
+
+def test_serializer_write_array_numpy():
+    np = pytest.importorskip("numpy")
+
+    stream = SerializingStream(byteorder=ByteOrder.BIG_ENDIAN)
+
+    stream.write_array("uint16", np.array([1, 2]))
+
+    assert bytes(stream) == bytes.fromhex("00 01 00 02")
+
+    with pytest.raises(OverflowError):
+        stream.write_array("uint8", np.array([0x100]))
+
+    with pytest.raises(OverflowError):
+        stream.write_array("uint16", np.array([-1]))
+
+    with pytest.raises(TypeError):
+        stream.write_array("int32", np.array([1.5]))
+
+    assert bytes(stream) == bytes.fromhex("00 01 00 02")
+
+
+def test_twoway_stream_array():
+    stream = TwoWayStream(byteorder=ByteOrder.BIG_ENDIAN)
+
+    stream.write_array("uint32", [1, 2])
+    stream.seek(0)
+
+    assert stream.read_array("uint32", 2).tolist() == [1, 2]
+
+
+def test_serializer_write_leb128():
+    stream = SerializingStream()
+
+    stream.write_uleb128(624485)
+    stream.write_sleb128(-123456)
+    stream.write_sleb128(2**40)
+    stream.write_uleb128_safe(2**40, 2)
+
+    assert bytes(stream) == bytes.fromhex("E5 8E 26 C0 BB 78 80 80 80 80 80 20 80 80")
+
+
+def test_serializer_write_leb128_many():
+    stream = SerializingStream()
+
+    stream.write_uleb128_many([0, 127, 128, 624485])
+    stream.write_sleb128_many([-1, 63, -64, 64])
+
+    assert bytes(stream) == bytes.fromhex("00 7F 80 01 E5 8E 26 7F 3F 40 C0 00")
+
+
+def test_twoway_leb128_many_roundtrip():
+    values = [0, -1, 2**31, -(2**31), 2**62, -(2**63), 2**70]
+    stream = TwoWayStream()
+
+    stream.write_sleb128_many(values)
+    stream.seek(0)
+
+    assert stream.read_sleb128_many() == (values, stream.size())
+
+
+def test_serializer_capacity():
+    stream = SerializingStream(byteorder=ByteOrder.BIG_ENDIAN, capacity=4)
+
+    stream.write_uint32(0xDEADBEEF)
+    stream.write_int16(-1)
+    stream.write_uleb128(624485)
+    stream.write_array("uint8", [1, 2])
+
+    assert bytes(stream) == bytes.fromhex("DE AD BE EF FF FF E5 8E 26 01 02")
+
+    with pytest.raises(struct.error):
+        stream.write_format("b", 0xFFFF)
+
+    assert stream.size() == 11
+
+    view = stream.getbuffer()
+    stream.seek(0)
+    stream.write_uint8(0)
+
+    assert isinstance(view, memoryview)
+    assert view[0] == 0
+
+
+def test_serializer_capacity_pack():
+    stream = SerializingStream(byteorder=ByteOrder.BIG_ENDIAN, capacity=8)
+
+    # appended within the reserved capacity, then past it
+    for value in range(3):
+        stream.write_uint32(value)
+
+    assert bytes(stream) == bytes.fromhex("00000000 00000001 00000002")
+
+    # failed packs leave the size and position as they were, both within the
+    # capacity and when it has to grow
+    for fmt in ("b", "q"):
+        stream.seek(0, io.SEEK_END)
+
+        with pytest.raises(struct.error):
+            stream.write_format(fmt, 1 << 70)
+
+        assert stream.size() == 12
+        assert stream.tell() == 12
+
+    # in place, without touching a cursor's copy
+    cursor = stream.cursor()
+    stream.seek(4)
+    stream.write_uint16(0xFFFF)
+
+    assert bytes(stream) == bytes.fromhex("00000000 FFFF0001 00000002")
+    assert stream.tell() == 6
+
+    cursor.write_uint8(0xAA)
+
+    assert bytes(cursor)[:5] == bytes.fromhex("AA000000 FF")
+    assert bytes(stream)[0] == 0
+
+    # cleared bytes read as zeros when a later write skips over them
+    stream.clear()
+    stream.seek(6)
+    stream.write_uint16(0x0102)
+
+    assert bytes(stream) == bytes.fromhex("00000000 0000 0102")
+
+
+def test_serializer_flush_to(tmp_path):
+    stream = SerializingStream(capacity=16)
+    stream.write(b"datastream")
+
+    path = tmp_path / "out.bin"
+
+    with open(path, "wb") as file:
+        assert stream.flush_to(file) == 10
+
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+
+    try:
+        stream.flush_to(fd)
+    finally:
+        os.close(fd)
+
+    assert path.read_bytes() == b"datastream" * 2
+
+    left, right = socket.socketpair()
+
+    with left, right:
+        SerializingStream(io.BytesIO(b"datastream")).flush_to(left)
+
+        assert right.recv(16) == b"datastream"
+
+
+def test_serializer_gather():
+    payload = bytes(range(256)) * 32
+
+    stream = SerializingStream(byteorder=ByteOrder.BIG_ENDIAN, gather=True)
+    stream.write_uint32(len(payload))
+    stream.write(payload)
+    stream.write_uint16(0xBEEF)
+
+    expected = len(payload).to_bytes(4, "big") + payload + b"\xBE\xEF"
+
+    assert stream.size() == len(expected)
+    assert stream.tell() == len(expected)
+    assert bytes(stream) == expected
+
+    # the payload is referenced, not copied
+    segments = stream._backing_stream.segments()
+
+    assert any(getattr(segment, "obj", None) is payload for segment in segments)
+
+    with pytest.raises(io.UnsupportedOperation):
+        stream.seek(0)
+
+    read_fd, write_fd = os.pipe()
+
+    try:
+        with open(read_fd, "rb") as reader:
+            assert stream.flush_to(write_fd) == len(expected)
+
+            os.close(write_fd)
+            write_fd = None
+
+            assert reader.read() == expected
+    finally:
+        if write_fd is not None:
+            os.close(write_fd)
+
+    file = io.BytesIO()
+    stream.flush_to(file)
+
+    assert file.getvalue() == expected
+
+    stream.clear()
+
+    assert bytes(stream) == b""
+
+
+def test_serializer_gather_partial_writes():
+    class SlowSocket:
+        def __init__(self):
+            self.data = bytearray()
+
+        def sendmsg(self, buffers):
+            # accept at most 3 bytes per call
+            sent = bytes(buffers[0][:3])
+            self.data += sent
+
+            return len(sent)
+
+    stream = SerializingStream(gather=True)
+    stream.write(b"a")
+    stream.write(b"b" * 5000)
+    stream.write(b"cd")
+
+    target = SlowSocket()
+
+    assert stream.flush_to(target) == 5003
+    assert target.data == bytes(stream)
+
+
+def test_twoway_matches_serializer():
+    for name in ("write_int8", "write_int16", "write_int32", "write_int64"):
+        serializer = SerializingStream()
+        twoway = TwoWayStream()
+
+        getattr(serializer, name)(0xFF)
+        getattr(twoway, name)(0xFF)
+
+        assert bytes(twoway) == bytes(serializer)
+
+    assert TwoWayStream.write_uint32 is SerializingStream.write_uint32
+    assert TwoWayStream.read_uint32 is DeserializingStream.read_uint32
+
+    stream = TwoWayStream(byteorder=ByteOrder.BIG_ENDIAN)
+    stream.write_uint16(0x1234)
+    stream.byteorder = ByteOrder.LITTLE_ENDIAN
+    stream.write_uint16(0x1234)
+    stream.seek(0)
+
+    assert stream.read_uint16() == 0x3412
+    assert stream.read_uint16() == 0x1234
+
+
+def test_write_strings():
+    stream = SerializingStream(byteorder=ByteOrder.BIG_ENDIAN)
+
+    stream.write_string("hé")
+    stream.write_string("ab", prefix="uint16")
+    stream.write_bytes_prefixed(b"\x00\x01", prefix="uint8")
+    stream.write_strings(["x", "yz"], prefix="uint32")
+
+    assert bytes(stream) == bytes.fromhex(
+        "03 68 C3 A9 00 02 61 62 02 00 01 00 00 00 01 78 00 00 00 02 79 7A"
+    )
+
+    with pytest.raises(ValueError):
+        stream.write_string("a", prefix="int8")
+
+
+def test_twoway_strings_roundtrip():
+    values = ["alpha", "", "βeta", "alpha"] * 50
+    stream = TwoWayStream(byteorder=ByteOrder.LITTLE_ENDIAN)
+
+    for prefix in ("uleb128", "uint8", "uint16", "uint32"):
+        stream.clear()
+        stream.write_strings(values, prefix=prefix)
+        stream.write_bytes_prefixed(b"blob", prefix=prefix)
+        stream.seek(0)
+
+        assert stream.read_strings(len(values), prefix=prefix) == values
+        assert stream.read_bytes_prefixed(prefix) == b"blob"